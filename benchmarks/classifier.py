@@ -0,0 +1,91 @@
+"""Compare country/category classifier throughput against the keyword matcher.
+
+Usage:
+    python benchmarks/classifier.py --articles articles.jsonl
+    python benchmarks/classifier.py --synthetic 2000 --classifiers keyword,tfidf,embedding
+
+`articles.jsonl` holds one JSON object per line with a `text` field. Agreement
+is reported against the `keyword` classifier (`infer_country_category`).
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import main  # noqa: E402
+
+
+def synthetic_articles(count, words_per_article=600):
+    terms = [
+        term
+        for lexicon in (main.COUNTRY_LEXICON, main.CATEGORY_LEXICON)
+        for terms in lexicon.values()
+        for term in terms
+    ]
+    filler = "the a of to in and said on for with that was it by as at from has his her its".split()
+    rng = random.Random(0)
+    return [
+        " ".join(rng.choice(terms) if rng.random() < 0.02 else rng.choice(filler) for _ in range(words_per_article))
+        for _ in range(count)
+    ]
+
+
+def run(name, texts, batch_size):
+    if name == "keyword":
+        start = time.perf_counter()
+        predictions = [main.infer_country_category(text) for text in texts]
+        return predictions, time.perf_counter() - start, 0.0
+
+    start = time.perf_counter()
+    classifier = main.CLASSIFIERS[name]()
+    setup_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predictions = []
+    for i in range(0, len(texts), batch_size):
+        predictions.extend(classifier.classify_batch(texts[i:i + batch_size]))
+    return predictions, time.perf_counter() - start, setup_seconds
+
+
+def benchmark():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", help="JSONL file with a `text` field per line")
+    parser.add_argument("--synthetic", type=int, default=1000, help="Generate this many articles when --articles is not given")
+    parser.add_argument("--classifiers", default="keyword,tfidf")
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    if args.articles:
+        with open(args.articles) as f:
+            texts = [json.loads(line)["text"] for line in f if line.strip()]
+    else:
+        texts = synthetic_articles(args.synthetic)
+
+    baseline = None
+    print(f"{'classifier':<12} {'setup s':>8} {'articles/s':>12} {'country agree':>14} {'category agree':>15}")
+    for name in args.classifiers.split(","):
+        try:
+            predictions, seconds, setup_seconds = run(name, texts, args.batch_size)
+        except RuntimeError as e:
+            print(f"{name:<12} skipped: {e}")
+            continue
+        if name == "keyword":
+            baseline = predictions
+        if baseline:
+            country_agree = sum(p[0] == b[0] for p, b in zip(predictions, baseline)) / len(texts)
+            category_agree = sum(p[1] == b[1] for p, b in zip(predictions, baseline)) / len(texts)
+        else:
+            country_agree = category_agree = float("nan")
+        print(
+            f"{name:<12} {setup_seconds:>8.2f} {len(texts) / seconds:>12.0f} "
+            f"{country_agree:>14.1%} {category_agree:>15.1%}"
+        )
+
+
+if __name__ == "__main__":
+    benchmark()
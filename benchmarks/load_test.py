@@ -0,0 +1,338 @@
+"""Load-test /process_url against local stand-ins for publishers, DeepSeek and Airtable.
+
+The script starts a stub server (static article HTML, a DeepSeek-compatible
+chat-completions endpoint and an Airtable-compatible records endpoint), starts
+the app with uvicorn pointed at the stubs, drives `/process_url` at the given
+concurrency and reports throughput, latency percentiles and the per-stage
+breakdown scraped from `/metrics`.
+
+Usage:
+    python benchmarks/load_test.py --requests 500 --concurrency 32 --output run.json
+    python benchmarks/load_test.py --requests 500 --concurrency 32 --baseline run.json
+    python benchmarks/load_test.py --deepseek-error-rate 0.2      # exercises the BART fallback
+    python benchmarks/load_test.py --env AIRTABLE_WRITE_MODE=sync # any app setting
+
+Run only the stubs (e.g. to point a deployed instance at them):
+    python benchmarks/load_test.py stubs --port 9100
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORDS = (
+    "the government said on tuesday that exports of steel and software rose sharply as investors "
+    "welcomed new trade rules while the central bank kept interest rates unchanged amid inflation "
+    "concerns and lawmakers in parliament debated the budget for the coming election year"
+).split()
+PLACES = ["India", "China", "the United States", "Britain", "Japan", "Germany", "Brazil", "Canada"]
+
+
+# Stub servers
+def article_html(article_id: int, paragraphs: int, nonce: str = "") -> str:
+    rng = random.Random(article_id)
+    title = f"{rng.choice(PLACES)} {' '.join(rng.sample(WORDS, 5))}".capitalize()
+    body = "\n".join(
+        "<p>" + " ".join(
+            f"{rng.choice(PLACES)} {' '.join(rng.choices(WORDS, k=rng.randint(12, 24)))}."
+            for _ in range(rng.randint(3, 6))
+        ) + "</p>"
+        for _ in range(paragraphs)
+    )
+    if nonce:
+        body += f"\n<p>Revision {nonce} of story {article_id}.</p>"
+    return (
+        f"<html><head><title>{title}</title>"
+        f'<meta property="article:published_time" content="2024-05-{article_id % 28 + 1:02d}T08:00:00Z">'
+        f"</head><body><article><h1>{title}</h1>{body}</article></body></html>"
+    )
+
+
+def build_stub_app(args):
+    from fastapi import FastAPI, Request
+    from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+
+    stub = FastAPI()
+    corpus = {}
+    if args.corpus:
+        for i, name in enumerate(sorted(os.listdir(args.corpus))):
+            with open(os.path.join(args.corpus, name)) as f:
+                corpus[i] = f.read()
+
+    async def latency(mean_ms: float):
+        if mean_ms:
+            await asyncio.sleep(max(0.0, random.gauss(mean_ms, mean_ms / 4)) / 1000)
+
+    @stub.get("/articles/{article_id}.html", response_class=HTMLResponse)
+    async def article(article_id: int, v: str = ""):
+        await latency(args.article_latency_ms)
+        if corpus:
+            return corpus[article_id % len(corpus)]
+        return article_html(article_id, args.paragraphs, v)
+
+    @stub.post("/chat/completions")
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        await latency(args.deepseek_latency_ms)
+        if random.random() < args.deepseek_error_rate:
+            return JSONResponse({"error": {"message": "stub failure"}}, status_code=503)
+        prompt = payload["messages"][-1]["content"]
+        sentences = re.split(r"(?<=[.!?])\s+", prompt.split("\n\n", 1)[-1])
+        summary = " ".join(sentences[:3])
+        if not payload.get("stream"):
+            return {"choices": [{"index": 0, "message": {"role": "assistant", "content": summary}}]}
+
+        async def events():
+            for word in summary.split(" "):
+                chunk = {"choices": [{"index": 0, "delta": {"content": word + " "}}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await latency(args.deepseek_token_latency_ms)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    # Airtable allows 5 requests per second per base
+    buckets = {}
+    urls = {}  # (base, table) -> {URL field: record id}, for upserts
+
+    @stub.api_route("/v0/{base_id}/{table}", methods=["POST", "PATCH", "GET"])
+    async def airtable(base_id: str, table: str, request: Request):
+        await latency(args.airtable_latency_ms)
+        now = time.monotonic()
+        tokens, updated = buckets.get(base_id, (args.airtable_rate_limit, now))
+        tokens = min(args.airtable_rate_limit, tokens + (now - updated) * args.airtable_rate_limit)
+        if tokens < 1:
+            buckets[base_id] = (tokens, now)
+            return JSONResponse({"errors": [{"error": "RATE_LIMIT_REACHED"}]}, status_code=429)
+        buckets[base_id] = (tokens - 1, now)
+
+        if request.method == "GET":
+            return {"records": []}
+        payload = await request.json()
+        records = payload.get("records") or [payload]
+        table_urls = urls.setdefault((base_id, table), {})
+        merge = request.method == "PATCH" and "performUpsert" in payload
+        known_ids = set(table_urls.values())
+        if any(record.get("id") and record["id"] not in known_ids for record in records):
+            return JSONResponse({"error": {"type": "ROW_DOES_NOT_EXIST"}}, status_code=422)
+        written, created_ids, updated_ids = [], [], []
+        for record in records:
+            record_id = record.get("id") or (table_urls.get(record["fields"].get("URL")) if merge else None)
+            if record_id:
+                updated_ids.append(record_id)
+            else:
+                record_id = f"rec{random.getrandbits(48):012x}"
+                created_ids.append(record_id)
+            table_urls[record["fields"].get("URL")] = record_id
+            written.append({"id": record_id, "fields": record["fields"]})
+        if merge:
+            return {"records": written, "createdRecords": created_ids, "updatedRecords": updated_ids}
+        if "records" in payload:
+            return {"records": written}
+        return written[0]
+
+    return stub
+
+
+def run_stubs(args):
+    import uvicorn
+    uvicorn.run(build_stub_app(args), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+# Load driver
+async def wait_until_up(url: str, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def stage_totals(metrics_text: str) -> dict:
+    totals = {}
+    for line in metrics_text.splitlines():
+        match = re.match(r'news_stage_seconds_(sum|count)\{stage="([^"]+)"\} ([0-9.e+-]+)', line)
+        if match:
+            kind, stage, value = match.groups()
+            totals.setdefault(stage, {"sum": 0.0, "count": 0.0})[kind] += float(value)
+    return totals
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def drive(app_url: str, stub_url: str, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=600, limits=limits) as client:
+        before = stage_totals((await client.get(f"{app_url}/metrics")).text)
+
+        latencies, errors = [], 0
+        slots = asyncio.Semaphore(args.concurrency)
+
+        async def one(i: int):
+            nonlocal errors
+            article_id = i if args.unique else i % args.corpus_size
+            url = f"{stub_url}/articles/{article_id}.html"
+            if args.unique:
+                url += f"?v={i}"
+            async with slots:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(f"{app_url}/process_url", json={"url": url})
+                    if response.status_code != 200 or "error" in response.json():
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+        after = stage_totals((await client.get(f"{app_url}/metrics")).text)
+
+    stages = {}
+    for stage, total in after.items():
+        count = total["count"] - before.get(stage, {}).get("count", 0)
+        if count:
+            seconds = total["sum"] - before.get(stage, {}).get("sum", 0)
+            stages[stage] = {"count": int(count), "mean_ms": 1000 * seconds / count}
+
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "errors": errors,
+        "seconds": elapsed,
+        "throughput_rps": args.requests / elapsed,
+        "latency_ms": {
+            "p50": 1000 * percentile(latencies, 50),
+            "p95": 1000 * percentile(latencies, 95),
+            "p99": 1000 * percentile(latencies, 99),
+            "mean": 1000 * statistics.mean(latencies),
+        },
+        "stages": stages,
+    }
+
+
+def report(result: dict, baseline: dict = None):
+    def delta(value, old):
+        return f" ({(value - old) / old:+.0%})" if old else ""
+
+    base = baseline or {}
+    print(f"requests     {result['requests']} at concurrency {result['concurrency']}, {result['errors']} errors")
+    print(f"throughput   {result['throughput_rps']:.1f} req/s{delta(result['throughput_rps'], base.get('throughput_rps'))}")
+    for name, value in result["latency_ms"].items():
+        print(f"latency {name:<4} {value:.0f} ms{delta(value, base.get('latency_ms', {}).get(name))}")
+    print("stages (mean per call):")
+    for stage, stats in sorted(result["stages"].items(), key=lambda item: -item[1]["mean_ms"]):
+        old = base.get("stages", {}).get(stage, {}).get("mean_ms")
+        print(f"  {stage:<16} {stats['mean_ms']:>9.1f} ms  x{stats['count']}{delta(stats['mean_ms'], old)}")
+
+
+async def run_benchmark(args):
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    app_url = f"http://127.0.0.1:{args.app_port}"
+    workdir = tempfile.mkdtemp(prefix="news-bench-")
+
+    stub_cmd = [sys.executable, os.path.abspath(__file__), "stubs", "--port", str(args.stub_port)]
+    for option in ("article_latency_ms", "deepseek_latency_ms", "deepseek_token_latency_ms", "deepseek_error_rate",
+                   "airtable_latency_ms", "airtable_rate_limit", "paragraphs"):
+        stub_cmd += [f"--{option.replace('_', '-')}", str(getattr(args, option))]
+    if args.corpus:
+        stub_cmd += ["--corpus", args.corpus]
+
+    env = {
+        **os.environ,
+        "DEEPSEEK_URL": f"{stub_url}/chat/completions",
+        "DEEPSEEK_API_KEY": "bench",
+        "AIRTABLE_API_URL": f"{stub_url}/v0",
+        "AIRTABLE_API_KEY": "bench",
+        "AIRTABLE_BASE_ID": "appBench",
+        "AIRTABLE_SPOOL_PATH": os.path.join(workdir, "airtable_spool.jsonl"),
+        "JOBS_DB": os.path.join(workdir, "jobs.db"),
+        "URL_INDEX_DB": os.path.join(workdir, "url_index.db"),
+        "DEDUP_SNAPSHOT_PATH": os.path.join(workdir, "dedup_index.npz"),
+        "HTTP2_ENABLED": "0",  # the stubs speak HTTP/1.1 only
+        # Every stub article is on one host, so per-domain politeness is off unless set with --env
+        "DOWNLOAD_PER_DOMAIN_CONCURRENCY": str(args.concurrency),
+        "DOWNLOAD_CRAWL_DELAY": "0",
+    }
+    env.update(dict(item.split("=", 1) for item in args.env))
+    app_cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.app_port),
+               "--log-level", "warning"]
+
+    stubs = subprocess.Popen(stub_cmd)
+    app = subprocess.Popen(app_cmd, cwd=ROOT, env=env)
+    try:
+        await wait_until_up(f"{stub_url}/docs")
+        await wait_until_up(f"{app_url}/")
+        result = await drive(app_url, stub_url, args)
+    finally:
+        for proc in (app, stubs):
+            proc.terminate()
+            proc.wait()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    report(result, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+def add_stub_options(parser):
+    parser.add_argument("--corpus", help="Directory of .html files to serve instead of generated articles")
+    parser.add_argument("--paragraphs", type=int, default=8, help="Paragraphs per generated article")
+    parser.add_argument("--article-latency-ms", type=float, default=50)
+    parser.add_argument("--deepseek-latency-ms", type=float, default=800)
+    parser.add_argument("--deepseek-token-latency-ms", type=float, default=5)
+    parser.add_argument("--deepseek-error-rate", type=float, default=0.0)
+    parser.add_argument("--airtable-latency-ms", type=float, default=150)
+    parser.add_argument("--airtable-rate-limit", type=float, default=5, help="Requests per second per base")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "stubs":
+        parser = argparse.ArgumentParser(description="Run only the stub servers")
+        parser.add_argument("--port", type=int, default=9100)
+        add_stub_options(parser)
+        run_stubs(parser.parse_args(sys.argv[2:]))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--corpus-size", type=int, default=50, help="Distinct articles when --no-unique is set")
+    parser.add_argument("--no-unique", dest="unique", action="store_false",
+                        help="Reuse corpus articles so result/summary caches get hits")
+    parser.add_argument("--app-port", type=int, default=9000)
+    parser.add_argument("--stub-port", type=int, default=9100)
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE setting passed to the app")
+    parser.add_argument("--output", help="Write results as JSON (use as a later --baseline)")
+    parser.add_argument("--baseline", help="Compare against a previous --output file")
+    add_stub_options(parser)
+    asyncio.run(run_benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
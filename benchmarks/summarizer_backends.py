@@ -0,0 +1,141 @@
+"""Compare fallback summarizer backends on latency, peak RSS and ROUGE.
+
+Each backend runs in its own subprocess so load time and peak memory are
+measured in isolation. ROUGE is computed against the `reference` field of
+each article when present, otherwise against the output of the current
+`torch` backend.
+
+Usage:
+    python benchmarks/summarizer_backends.py --articles articles.jsonl
+    python benchmarks/summarizer_backends.py --articles articles.jsonl --backends torch,quantized,onnx --output results.json
+
+`articles.jsonl` holds one JSON object per line with a `text` field and an
+optional `reference` summary. ROUGE needs `pip install rouge-score`.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def load_articles(path, limit):
+    with open(path) as f:
+        articles = [json.loads(line) for line in f if line.strip()]
+    return articles[:limit] if limit else articles
+
+
+def run_backend(backend, articles_path, limit, batch_size):
+    import main
+
+    start = time.perf_counter()
+    summarizer = main.load_summarizer(backend)
+    load_seconds = time.perf_counter() - start
+
+    articles = load_articles(articles_path, limit)
+    # Warm up once so one-off graph/kernel setup isn't counted as latency
+    summarizer(articles[0]["text"], truncation=True, **main.BART_GENERATION_PARAMS)
+
+    latencies = []
+    summaries = []
+    for i in range(0, len(articles), batch_size):
+        batch = [article["text"] for article in articles[i:i + batch_size]]
+        start = time.perf_counter()
+        outputs = summarizer(batch, batch_size=len(batch), truncation=True, **main.BART_GENERATION_PARAMS)
+        elapsed = time.perf_counter() - start
+        latencies.extend([elapsed / len(batch)] * len(batch))
+        summaries.extend(output["summary_text"] for output in outputs)
+
+    return {
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "latency_mean": statistics.mean(latencies),
+        "latency_p50": statistics.median(latencies),
+        "latency_p95": percentile(latencies, 95),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "summaries": summaries,
+    }
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def rouge(predictions, references):
+    try:
+        from rouge_score import rouge_scorer
+    except ImportError:
+        return None
+    scorer = rouge_scorer.RougeScorer(["rouge1", "rouge2", "rougeL"], use_stemmer=True)
+    scores = [scorer.score(ref, pred) for pred, ref in zip(predictions, references)]
+    return {
+        name: statistics.mean(score[name].fmeasure for score in scores)
+        for name in ("rouge1", "rouge2", "rougeL")
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", required=True, help="JSONL file with `text` and optional `reference` fields")
+    parser.add_argument("--backends", default="torch,quantized,onnx")
+    parser.add_argument("--limit", type=int, default=50, help="Number of articles to summarize (0 = all)")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, args.articles, args.limit, args.batch_size)))
+        return
+
+    backends = args.backends.split(",")
+    if "torch" in backends:
+        backends = ["torch"] + [backend for backend in backends if backend != "torch"]
+
+    results = []
+    for backend in backends:
+        print(f"Benchmarking {backend}...", file=sys.stderr)
+        proc = subprocess.run(
+            [sys.executable, __file__, "--articles", args.articles, "--limit", str(args.limit),
+             "--batch-size", str(args.batch_size), "--worker", backend],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            print(f"{backend} failed:\n{proc.stderr}", file=sys.stderr)
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    articles = load_articles(args.articles, args.limit)
+    baseline = next((result["summaries"] for result in results if result["backend"] == "torch"), None)
+    for result in results:
+        if all("reference" in article for article in articles):
+            result["rouge"] = rouge(result["summaries"], [article["reference"] for article in articles])
+            result["rouge_against"] = "reference"
+        elif baseline is not None:
+            result["rouge"] = rouge(result["summaries"], baseline)
+            result["rouge_against"] = "torch"
+
+    print(f"{'backend':<10} {'load s':>8} {'mean s':>8} {'p50 s':>8} {'p95 s':>8} {'RSS MB':>8} {'rougeL':>8}")
+    for result in results:
+        rouge_l = result.get("rouge", {}) or {}
+        print(
+            f"{result['backend']:<10} {result['load_seconds']:>8.2f} {result['latency_mean']:>8.3f} "
+            f"{result['latency_p50']:>8.3f} {result['latency_p95']:>8.3f} {result['peak_rss_mb']:>8.0f} "
+            f"{rouge_l.get('rougeL', float('nan')):>8.3f}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""Command-line entry points for the news extractor.
+
+    python cli.py serve --port 8000         # production server: gunicorn + uvicorn workers sharing one preloaded model
+    python cli.py worker --concurrency 8    # process jobs queued by the web app (JOB_QUEUE_MODE=1)
+    python cli.py summarizer-service -n 2   # model processes for SUMMARIZER_MODE=service
+    python cli.py poll-feeds --feeds feeds.txt  # poll RSS/Atom/sitemap feeds and process new articles
+    python cli.py import-airtable           # backfill the seen-URL index from the Airtable table
+"""
+import os
+import gc
+import sys
+import time
+import signal
+import asyncio
+import argparse
+import tempfile
+import multiprocessing
+
+# Memory estimates used to size the worker pool (MB)
+SERVE_WORKER_MEMORY_MB = float(os.getenv("SERVE_WORKER_MEMORY_MB", 300))  # one worker without the model
+SERVE_MODEL_MEMORY_MB = float(os.getenv("SERVE_MODEL_MEMORY_MB", 1700))  # BART fallback weights
+
+
+def available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def available_memory_mb():
+    """MemAvailable from /proc/meminfo, capped by the container's cgroup limit; None if unknown."""
+    limits = []
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    limits.append(int(line.split()[1]) / 1024)
+    except OSError:
+        pass
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        if value.isdigit() and int(value) < 1 << 60:  # "max" or a huge number means no limit
+            limits.append(int(value) / 2 ** 20)
+    return min(limits) if limits else None
+
+
+def default_workers(preload_model, model_in_process=True):
+    # A preloaded model is shared copy-on-write, so it only counts once; in service
+    # mode (SUMMARIZER_MODE=service) the API workers don't hold it at all
+    cpus = available_cpus()
+    memory = available_memory_mb()
+    if memory is None:
+        return cpus
+    if not model_in_process:
+        fit = memory // SERVE_WORKER_MEMORY_MB
+    elif preload_model:
+        fit = (memory - SERVE_MODEL_MEMORY_MB) // SERVE_WORKER_MEMORY_MB
+    else:
+        fit = memory // (SERVE_WORKER_MEMORY_MB + SERVE_MODEL_MEMORY_MB)
+    return int(max(1, min(cpus, fit)))
+
+
+def serve(args):
+    from gunicorn.app.base import BaseApplication
+
+    # main isn't imported yet (see PROMETHEUS_MULTIPROC_DIR below), so read the mode directly
+    model_in_process = os.getenv("SUMMARIZER_MODE", "inprocess") != "service"
+    preload_model = args.preload_model and model_in_process
+    workers = args.workers or int(os.getenv("WEB_CONCURRENCY", 0)) or default_workers(preload_model, model_in_process)
+    # Sharing weights only pays off with several workers; a single worker binds the port
+    # right away and loads the model lazily (or with FALLBACK_WARMUP) like `uvicorn main:app`
+    preload_model = preload_model and workers > 1
+    threads_per_worker = max(1, available_cpus() // workers)
+    # Must be set before prometheus_client is imported (by main) so metrics are shared
+    metrics_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if workers > 1 and not metrics_dir:
+        metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="news-metrics-")
+
+    def on_starting(server):
+        if metrics_dir:
+            os.makedirs(metrics_dir, exist_ok=True)
+            for name in os.listdir(metrics_dir):
+                os.remove(os.path.join(metrics_dir, name))
+
+    def post_fork(server, worker):
+        # Split the cores between workers instead of every worker using all of them
+        os.environ["OMP_NUM_THREADS"] = str(threads_per_worker)
+        if "torch" in sys.modules:
+            sys.modules["torch"].set_num_threads(threads_per_worker)
+
+    def child_exit(server, worker):
+        if metrics_dir:
+            from prometheus_client import multiprocess
+            multiprocess.mark_process_dead(worker.pid)
+
+    class Server(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{args.host}:{args.port}",
+                "workers": workers,
+                "worker_class": "uvicorn.workers.UvicornWorker",
+                "preload_app": True,
+                "timeout": args.timeout,
+                "graceful_timeout": args.graceful_timeout,
+                "on_starting": on_starting,
+                "post_fork": post_fork,
+                "child_exit": child_exit,
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            # Runs once in the master: workers fork from here and share its memory pages
+            import main
+
+            if preload_model:
+                try:
+                    main.get_fallback_summarizer()
+                except Exception as e:
+                    print(f"Model preload error: {str(e)}")
+            # Keep the garbage collector from touching (and so copying) inherited objects
+            gc.freeze()
+            return main.app
+
+    print(f"Starting {workers} workers ({threads_per_worker} inference threads each, preload={preload_model})")
+    Server().run()
+
+
+async def worker(args):
+    import main
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    async with main.app.router.lifespan_context(main.app):
+        print(f"Worker started (concurrency={args.concurrency}, jobs db={main.JOBS_DB})")
+        await main.run_worker(args.concurrency, args.poll_interval, stop)
+    print("Worker stopped")
+
+
+async def poll_feeds(args):
+    import main
+
+    main.FEEDS_PATH = args.feeds or main.FEEDS_PATH
+    if not main.FEEDS_PATH:
+        raise SystemExit("No feed list: pass --feeds or set FEEDS_PATH")
+    main.FEED_POLLER_IN_APP = False  # this command is the poller
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    async with main.app.router.lifespan_context(main.app):
+        print(f"Polling feeds from {main.FEEDS_PATH} (state in {main.FEEDS_DB})")
+        await main.run_feed_poller(stop)
+    print("Feed poller stopped")
+
+
+async def import_airtable(args):
+    import main
+
+    async with main.app.router.lifespan_context(main.app):
+        imported = await main.import_airtable_index()
+    print(f"Imported {imported} Airtable records into {main.URL_INDEX_DB}")
+
+
+def run_summarizer_process(socket_path, threads):
+    import main
+
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+
+    async def run():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await main.serve_summarizer(socket_path, stop)
+
+    asyncio.run(run())
+
+
+def summarizer_service(args):
+    import main
+
+    # Load the model once here; the forked service processes share its weights
+    main.get_fallback_summarizer()
+    gc.freeze()
+
+    processes = args.processes or max(1, available_cpus() // 4)
+    threads = max(1, available_cpus() // processes)
+    context = multiprocessing.get_context("fork")
+    stopping = False
+
+    def start(index):
+        path = os.path.join(args.socket_dir, f"worker-{index}.sock")
+        process = context.Process(target=run_summarizer_process, args=(path, threads), daemon=True)
+        process.start()
+        return process
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    children = [start(index) for index in range(processes)]
+    print(f"Summarizer service: {processes} processes ({threads} threads each) in {args.socket_dir}")
+    while not stopping:
+        time.sleep(1)
+        for index, process in enumerate(children):
+            if not process.is_alive() and not stopping:
+                print(f"Summarizer process {process.pid} exited ({process.exitcode}), restarting")
+                children[index] = start(index)
+    for process in children:
+        process.terminate()
+    for process in children:
+        process.join(args.graceful_timeout)
+    print("Summarizer service stopped")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="News extractor command-line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Run the API with several worker processes")
+    serve_parser.add_argument("--host", default="0.0.0.0")
+    serve_parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    serve_parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: WEB_CONCURRENCY, or from cores and memory)")
+    serve_parser.add_argument("--no-preload-model", dest="preload_model", action="store_false", help="Let each worker load the fallback model lazily")
+    serve_parser.add_argument("--timeout", type=int, default=120, help="Seconds before an unresponsive worker is restarted")
+    serve_parser.add_argument("--graceful-timeout", type=int, default=30, help="Seconds workers get to finish on shutdown")
+    serve_parser.set_defaults(handler=serve)
+
+    service_parser = commands.add_parser("summarizer-service", help="Run fallback-model processes for SUMMARIZER_MODE=service")
+    service_parser.add_argument("-n", "--processes", type=int, default=0, help="Model processes (default: one per 4 cores)")
+    service_parser.add_argument("--socket-dir", default=os.getenv("SUMMARIZER_SOCKET_DIR", "/tmp/news-summarizer"))
+    service_parser.add_argument("--graceful-timeout", type=int, default=30, help="Seconds processes get to finish on shutdown")
+    service_parser.set_defaults(handler=summarizer_service)
+
+    feeds_parser = commands.add_parser("poll-feeds", help="Poll RSS/Atom/sitemap feeds and process new articles")
+    feeds_parser.add_argument("--feeds", help="File with one feed URL per line (default: FEEDS_PATH)")
+    feeds_parser.set_defaults(handler=poll_feeds)
+
+    import_parser = commands.add_parser("import-airtable", help="Backfill the seen-URL index from the Airtable table")
+    import_parser.set_defaults(handler=import_airtable)
+
+    worker_parser = commands.add_parser("worker", help="Run queued article-processing jobs")
+    worker_parser.add_argument("--concurrency", type=int, default=8, help="Jobs processed at the same time")
+    worker_parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to wait when the queue is empty")
+    worker_parser.set_defaults(handler=worker)
+
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    result = args.handler(args)
+    if asyncio.iscoroutine(result):
+        asyncio.run(result)
@@ -1,13 +1,31 @@
 import os
+import re
+import json
+import time
+import sqlite3
+import math
+import zlib
+import hashlib
+import fcntl
+import threading
 import requests
+import random
 import asyncio
 import httpx
-from fastapi import FastAPI, Request, BackgroundTasks
+import uuid
+import numpy as np
+from collections import OrderedDict, Counter, deque
+from contextlib import contextmanager, asynccontextmanager
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import List
+from fastapi import FastAPI, Request, BackgroundTasks, HTTPException
+from fastapi.responses import StreamingResponse, Response
+from prometheus_client import Counter as MetricCounter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import CollectorRegistry, REGISTRY, multiprocess
 from pydantic import BaseModel, HttpUrl
 from datetime import datetime
-from newspaper import Article
-from transformers import pipeline
-from langchain_core.documents import Document
+from xml.etree import ElementTree
 
 app = FastAPI()
 
@@ -16,112 +34,2286 @@ DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
 AIRTABLE_API_KEY = os.getenv("AIRTABLE_API_KEY")
 AIRTABLE_BASE_ID = os.getenv("AIRTABLE_BASE_ID")
 AIRTABLE_TABLE_NAME = "News extractor"
+AIRTABLE_API_URL = os.getenv("AIRTABLE_API_URL", "https://api.airtable.com/v0")
 
-DEEPSEEK_URL = "https://api.deepseek.com/v1/"
+DEEPSEEK_URL = os.getenv("DEEPSEEK_URL", "https://api.deepseek.com/v1/chat/completions")
 DEEPSEEK_MODEL = "deepseek-chat"
 
-# Fallback summarizer (load once)
-fallback_summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+# Concurrency limits for each pipeline stage (shared by all requests)
+MAX_CONCURRENT_DOWNLOADS = int(os.getenv("MAX_CONCURRENT_DOWNLOADS", 16))
+MAX_CONCURRENT_SUMMARIES = int(os.getenv("MAX_CONCURRENT_SUMMARIES", 8))
+MAX_CONCURRENT_AIRTABLE_WRITES = int(os.getenv("MAX_CONCURRENT_AIRTABLE_WRITES", 4))
+MAX_BATCH_URLS = int(os.getenv("MAX_BATCH_URLS", 1000))
+
+download_slots = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+summary_slots = asyncio.Semaphore(MAX_CONCURRENT_SUMMARIES)
+airtable_slots = asyncio.Semaphore(MAX_CONCURRENT_AIRTABLE_WRITES)
+
+# Metrics (Prometheus exposition format at /metrics). With several worker processes,
+# set PROMETHEUS_MULTIPROC_DIR (`cli.py serve` does) so /metrics adds up all of them.
+STAGE_SECONDS = Histogram(
+    "news_stage_seconds", "Time spent in each pipeline stage", ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+STAGE_IN_FLIGHT = Gauge(
+    "news_stage_in_flight", "Operations currently in each pipeline stage", ["stage"], multiprocess_mode="livesum"
+)
+ERRORS = MetricCounter("news_errors_total", "Errors by pipeline stage and error type", ["stage", "type"])
+SUMMARIES = MetricCounter("news_summaries_total", "Summaries produced, by source", ["source"])
+CACHE_REQUESTS = MetricCounter("news_cache_requests_total", "Cache lookups", ["cache", "result"])
+
+@contextmanager
+def track_stage(stage: str):
+    STAGE_IN_FLIGHT.labels(stage).inc()
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        record_error(stage, e)
+        raise
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+        STAGE_IN_FLIGHT.labels(stage).dec()
+
+def record_error(stage: str, error):
+    ERRORS.labels(stage, error if isinstance(error, str) else type(error).__name__).inc()
+
+# Shared HTTP clients, one connection pool per upstream host
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "1") == "1"
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", 20))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 10))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 10))
+DEEPSEEK_TIMEOUT = float(os.getenv("DEEPSEEK_TIMEOUT", 60))
+AIRTABLE_TIMEOUT = float(os.getenv("AIRTABLE_TIMEOUT", 30))
+DOWNLOAD_TIMEOUT = float(os.getenv("DOWNLOAD_TIMEOUT", 30))
+DOWNLOAD_MAX_CONNECTIONS = int(os.getenv("DOWNLOAD_MAX_CONNECTIONS", 100))
+DOWNLOAD_USER_AGENT = os.getenv("DOWNLOAD_USER_AGENT", "Mozilla/5.0 (compatible; NewsExtractor/1.0)")
+DOWNLOAD_MAX_REDIRECTS = int(os.getenv("DOWNLOAD_MAX_REDIRECTS", 5))
+
+HTTP_CLIENT_TIMEOUTS = {
+    "deepseek": DEEPSEEK_TIMEOUT,
+    "airtable": AIRTABLE_TIMEOUT,
+    "articles": DOWNLOAD_TIMEOUT,
+}
+
+# Publishers are many hosts, so the article client gets a larger pool
+HTTP_CLIENT_MAX_CONNECTIONS = {
+    "articles": DOWNLOAD_MAX_CONNECTIONS,
+}
+
+HTTP_CLIENT_OPTIONS = {
+    "articles": {
+        "follow_redirects": True,
+        "max_redirects": DOWNLOAD_MAX_REDIRECTS,
+        "headers": {"User-Agent": DOWNLOAD_USER_AGENT},
+    },
+}
+
+http_clients = {}
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    if name not in http_clients:
+        http_clients[name] = httpx.AsyncClient(
+            http2=HTTP2_ENABLED,
+            timeout=httpx.Timeout(HTTP_CLIENT_TIMEOUTS[name], connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=HTTP_CLIENT_MAX_CONNECTIONS.get(name, HTTP_MAX_CONNECTIONS_PER_HOST),
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            **HTTP_CLIENT_OPTIONS.get(name, {}),
+        )
+    return http_clients[name]
+
+@app.on_event("startup")
+async def startup_http_clients():
+    for name in HTTP_CLIENT_TIMEOUTS:
+        get_http_client(name)
+
+# Registered at the end of the file, after everything that may still send requests
+async def shutdown_http_clients():
+    for client in http_clients.values():
+        await client.aclose()
+    http_clients.clear()
+
+# Executors for blocking work (parsing, inference), kept off the event loop
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", os.cpu_count() or 1))
+PARSE_EXECUTOR = os.getenv("PARSE_EXECUTOR", "thread")  # "thread" or "process"
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", 1))
+
+executors = {}
+
+def get_executor(name: str):
+    if name not in executors:
+        if name == "parse" and PARSE_EXECUTOR == "process":
+            executors[name] = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+        elif name == "parse":
+            executors[name] = ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix="parse")
+        elif name == "inference":
+            executors[name] = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+        elif name == "classify":
+            executors[name] = ThreadPoolExecutor(max_workers=1, thread_name_prefix="classify")
+        elif name == "text":
+            executors[name] = ThreadPoolExecutor(max_workers=2, thread_name_prefix="text")
+        else:
+            raise ValueError(f"Unknown executor: {name}")
+    return executors[name]
+
+async def run_in_executor(name: str, func, *args):
+    return await asyncio.get_running_loop().run_in_executor(get_executor(name), func, *args)
+
+# Pull up to max_size items from a queue, waiting at most max_wait after the first
+async def collect_batch(queue: asyncio.Queue, max_size: int, max_wait: float) -> list:
+    loop = asyncio.get_running_loop()
+    batch = [await queue.get()]
+    deadline = loop.time() + max_wait
+    while len(batch) < max_size:
+        if not queue.empty():
+            batch.append(queue.get_nowait())
+            continue
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), timeout))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+# Micro-batching: gather items from concurrent callers and run them as one batch, with up
+# to max_in_flight batches running at once
+class MicroBatcher:
+    def __init__(self, batch_fn, max_batch_size: int, max_wait: float, executor: str = "inference",
+                 max_in_flight: int = 1):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.executor = executor
+        self.max_in_flight = max_in_flight
+        self.queue = None
+        self.worker = None
+
+    def start(self):
+        if self.worker is None or self.worker.done():
+            self.queue = asyncio.Queue()
+            self.worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.worker is None:
+            return
+        self.worker.cancel()
+        try:
+            await self.worker
+        except asyncio.CancelledError:
+            pass
+        while not self.queue.empty():
+            _, future = self.queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Batcher stopped"))
+        self.worker = None
+
+    async def submit(self, item):
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((item, future))
+        return await future
+
+    async def _collect(self):
+        batch = await collect_batch(self.queue, self.max_batch_size, self.max_wait)
+        return [(item, future) for item, future in batch if not future.done()]
+
+    @staticmethod
+    def _fail(batch: list, error: Exception):
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _run_batch(self, batch: list):
+        try:
+            results = await run_in_executor(self.executor, self.batch_fn, [item for item, _ in batch])
+        except asyncio.CancelledError:
+            self._fail(batch, RuntimeError("Batcher stopped"))
+            raise
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _run(self):
+        slots = asyncio.Semaphore(self.max_in_flight)
+        running = set()
+        try:
+            while True:
+                # Wait for a free slot first, so items keep queueing up into the next batch
+                await slots.acquire()
+                batch = await self._collect()
+                if not batch:
+                    slots.release()
+                    continue
+                task = asyncio.create_task(self._run_batch(batch))
+                running.add(task)
+                task.add_done_callback(running.discard)
+                task.add_done_callback(lambda _: slots.release())
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.wait(running)
+
+# Registered at the end of the file, after everything that may still submit work
+async def shutdown_executors():
+    for executor in executors.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    executors.clear()
+
+# Fallback summarizer (loaded lazily on first use, or by the optional warmup task)
+BART_MODEL = "facebook/bart-large-cnn"
+BART_GENERATION_PARAMS = {"max_length": 150, "min_length": 30, "do_sample": False}
+BART_MAX_BATCH_SIZE = int(os.getenv("BART_MAX_BATCH_SIZE", 8))
+BART_MAX_WAIT_MS = float(os.getenv("BART_MAX_WAIT_MS", 20))
+FALLBACK_WARMUP = os.getenv("FALLBACK_WARMUP", "0") == "1"
+SUMMARIZER_BACKEND = os.getenv("SUMMARIZER_BACKEND", "torch")  # "torch", "quantized" or "onnx"
+SUMMARIZER_ONNX_DIR = os.getenv("SUMMARIZER_ONNX_DIR", "onnx/bart-large-cnn")
+
+fallback_summarizer = None
+fallback_summarizer_lock = threading.Lock()
+
+# Summarizer backends all return a transformers summarization pipeline
+def load_summarizer(backend: str = SUMMARIZER_BACKEND):
+    from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
+
+    if backend == "torch":
+        return pipeline("summarization", model=BART_MODEL)
+
+    tokenizer = AutoTokenizer.from_pretrained(BART_MODEL)
+    if backend == "quantized":
+        import torch
+
+        model = AutoModelForSeq2SeqLM.from_pretrained(BART_MODEL)
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return pipeline("summarization", model=model, tokenizer=tokenizer)
+
+    if backend == "onnx":
+        try:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError as e:
+            raise RuntimeError("SUMMARIZER_BACKEND=onnx requires `pip install optimum[onnxruntime]`") from e
+        if os.path.isdir(SUMMARIZER_ONNX_DIR):
+            model = ORTModelForSeq2SeqLM.from_pretrained(SUMMARIZER_ONNX_DIR)
+        else:
+            model = ORTModelForSeq2SeqLM.from_pretrained(BART_MODEL, export=True)
+            model.save_pretrained(SUMMARIZER_ONNX_DIR)
+        return pipeline("summarization", model=model, tokenizer=tokenizer)
+
+    raise ValueError(f"Unknown summarizer backend: {backend}")
+
+def get_fallback_summarizer():
+    global fallback_summarizer
+    if fallback_summarizer is None:
+        with fallback_summarizer_lock:
+            if fallback_summarizer is None:
+                fallback_summarizer = load_summarizer()
+    return fallback_summarizer
 
 class ArticleInput(BaseModel):
     url: HttpUrl
+    force: bool = False  # reprocess even if the URL was already processed
+
+class BatchInput(BaseModel):
+    urls: List[HttpUrl]
+    force: bool = False
 
 # Root route
 @app.get("/")
 async def root():
     return {"message": "News extractor is live"}
 
-# Country/category inference
-def infer_country_category(text: str):
-    text_lower = text.lower()
-    country = "Global"
-    category = "General"
-    if "india" in text_lower:
-        country = "India"
-    elif "us" in text_lower or "america" in text_lower:
-        country = "USA"
-    elif "china" in text_lower:
-        country = "China"
-
-    if "finance" in text_lower or "stock" in text_lower:
-        category = "Finance"
-    elif "tech" in text_lower or "software" in text_lower:
-        category = "Technology"
-    elif "sports" in text_lower:
-        category = "Sports"
+# Country/category inference: lexicons are matched as whole words in a single pass.
+# Override them with a JSON file ({"countries": {...}, "categories": {...}}) via CLASSIFIER_LEXICON_PATH.
+CLASSIFIER_LEXICON_PATH = os.getenv("CLASSIFIER_LEXICON_PATH")
+
+COUNTRY_LEXICON = {
+    "India": ["india", "indian", "indians", "new delhi", "mumbai", "modi"],
+    "USA": ["united states", "u.s.", "u.s.a.", "usa", "america", "american", "americans", "white house", "washington"],
+    "China": ["china", "chinese", "beijing", "shanghai", "xi jinping"],
+    "UK": ["united kingdom", "u.k.", "britain", "british", "england", "london"],
+    "Russia": ["russia", "russian", "russians", "moscow", "kremlin", "putin"],
+    "Japan": ["japan", "japanese", "tokyo"],
+    "Germany": ["germany", "german", "berlin"],
+    "France": ["france", "french", "paris"],
+    "Canada": ["canada", "canadian", "ottawa", "toronto"],
+    "Australia": ["australia", "australian", "canberra", "sydney"],
+    "Brazil": ["brazil", "brazilian", "brasilia"],
+    "Pakistan": ["pakistan", "pakistani", "islamabad"],
+}
+
+CATEGORY_LEXICON = {
+    "Finance": ["finance", "financial", "stock", "stocks", "shares", "investor", "investors", "bank", "banks", "bond", "bonds", "nasdaq", "dow jones"],
+    "Technology": ["tech", "technology", "software", "hardware", "startup", "artificial intelligence", "ai", "chip", "chips", "semiconductor", "smartphone"],
+    "Sports": ["sports", "sport", "football", "cricket", "tennis", "olympics", "tournament", "championship", "league"],
+    "Trade": ["trade", "tariff", "tariffs", "export", "exports", "import", "imports", "wto", "trade deal"],
+    "Economy": ["economy", "economic", "gdp", "inflation", "recession", "unemployment", "interest rates", "central bank"],
+    "Politics": ["election", "elections", "parliament", "congress", "senate", "minister", "president", "government", "policy", "lawmakers"],
+}
+
+if CLASSIFIER_LEXICON_PATH:
+    with open(CLASSIFIER_LEXICON_PATH) as f:
+        lexicons = json.load(f)
+    COUNTRY_LEXICON = lexicons.get("countries", COUNTRY_LEXICON)
+    CATEGORY_LEXICON = lexicons.get("categories", CATEGORY_LEXICON)
+
+# Build a regex from a character trie so matching cost doesn't grow with the number of terms
+def trie_regex(terms) -> str:
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
 
+    return build(trie)
+
+class KeywordMatcher:
+    def __init__(self, lexicon: dict):
+        self.labels = list(lexicon)
+        self.term_labels = {
+            " ".join(term.lower().split()): label
+            for label, terms in lexicon.items()
+            for term in terms
+        }
+        self.pattern = re.compile(r"(?<!\w)" + trie_regex(self.term_labels) + r"(?!\w)")
+
+    def scores(self, normalized_text: str) -> Counter:
+        return Counter(self.term_labels[match.group(0)] for match in self.pattern.finditer(normalized_text))
+
+    def best(self, scores: Counter, default: str) -> str:
+        # Ties go to the label listed first in the lexicon
+        return max(self.labels, key=lambda label: scores[label]) if scores else default
+
+country_matcher = KeywordMatcher(COUNTRY_LEXICON)
+category_matcher = KeywordMatcher(CATEGORY_LEXICON)
+
+def keyword_scores(text: str):
+    normalized = normalize_text(text)
+    return country_matcher.scores(normalized), category_matcher.scores(normalized)
+
+def infer_country_category(text: str):
+    country_scores, category_scores = keyword_scores(text)
+    country = country_matcher.best(country_scores, "Global")
+    category = category_matcher.best(category_scores, "General")
     return country, category
 
+# Nearest-centroid classifiers: label centroids are built once from the lexicons, so
+# classifying a batch is one matrix multiply per task
+CLASSIFIER = os.getenv("CLASSIFIER", "keyword")  # "keyword", "tfidf" or "embedding"
+CLASSIFIER_EMBEDDING_MODEL = os.getenv("CLASSIFIER_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+CLASSIFIER_MIN_SCORE = float(os.getenv("CLASSIFIER_MIN_SCORE", 0.1))
+CLASSIFIER_MAX_BATCH_SIZE = int(os.getenv("CLASSIFIER_MAX_BATCH_SIZE", 64))
+CLASSIFIER_MAX_WAIT_MS = float(os.getenv("CLASSIFIER_MAX_WAIT_MS", 5))
+
+class CentroidClassifier:
+    def __init__(self):
+        self.tasks = {
+            "country": (list(COUNTRY_LEXICON), COUNTRY_LEXICON, "Global"),
+            "category": (list(CATEGORY_LEXICON), CATEGORY_LEXICON, "General"),
+        }
+        self.centroids = {
+            task: self.label_centroids(labels, lexicon)
+            for task, (labels, lexicon, _) in self.tasks.items()
+        }
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def label_centroids(self, labels: List[str], lexicon: dict) -> np.ndarray:
+        raise NotImplementedError
+
+    def task_vectors(self, vectors: np.ndarray, task: str) -> np.ndarray:
+        return vectors
+
+    def classify_batch(self, texts: List[str]) -> List[tuple]:
+        vectors = self.embed(texts)
+        predictions = {}
+        for task, (labels, _, default) in self.tasks.items():
+            scores = self.task_vectors(vectors, task) @ self.centroids[task].T
+            best = scores.argmax(axis=1)
+            predictions[task] = [
+                labels[j] if scores[i, j] >= CLASSIFIER_MIN_SCORE else default
+                for i, j in enumerate(best)
+            ]
+        return list(zip(predictions["country"], predictions["category"]))
+
+def l2_normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+# Features are whole lexicon terms ("u.s.", "prime minister"), matched like KeywordMatcher
+# does, rather than word tokens: splitting on \w+ made "u.s." match every possessive 's.
+# Each task is scored on its own lexicon's columns, normalized separately, so a page full of
+# finance terms doesn't dilute its country terms below CLASSIFIER_MIN_SCORE
+class TfidfClassifier(CentroidClassifier):
+    def __init__(self):
+        seed_docs = [
+            {self.term(term) for term in terms}
+            for lexicon in (COUNTRY_LEXICON, CATEGORY_LEXICON)
+            for terms in lexicon.values()
+        ]
+        self.vocab = {term: i for i, term in enumerate(sorted(set().union(*seed_docs)))}
+        self.pattern = re.compile(r"(?<!\w)" + trie_regex(self.vocab) + r"(?!\w)")
+        df = np.zeros(len(self.vocab), dtype=np.float32)
+        for doc in seed_docs:
+            df[[self.vocab[term] for term in doc]] += 1
+        self.idf = np.log((1 + len(seed_docs)) / (1 + df)) + 1
+        super().__init__()
+        self.columns = {task: self.lexicon_columns(lexicon) for task, (_, lexicon, _) in self.tasks.items()}
+
+    @staticmethod
+    def term(term: str) -> str:
+        return " ".join(term.lower().split())
+
+    def lexicon_columns(self, lexicon: dict) -> np.ndarray:
+        return np.array(sorted({self.vocab[self.term(term)] for terms in lexicon.values() for term in terms}))
+
+    def counts(self, texts: List[str]) -> np.ndarray:
+        rows = np.zeros((len(texts), len(self.vocab)), dtype=np.float32)
+        for i, text in enumerate(texts):
+            ids = [self.vocab[match.group(0)] for match in self.pattern.finditer(normalize_text(text))]
+            if ids:
+                rows[i] = np.bincount(ids, minlength=len(self.vocab))
+        return rows
+
+    def weigh(self, counts: np.ndarray) -> np.ndarray:
+        return np.log1p(counts) * self.idf
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return self.weigh(self.counts(texts))
+
+    def task_vectors(self, vectors: np.ndarray, task: str) -> np.ndarray:
+        return l2_normalize(vectors[:, self.columns[task]])
+
+    def label_centroids(self, labels: List[str], lexicon: dict) -> np.ndarray:
+        rows = np.zeros((len(labels), len(self.vocab)), dtype=np.float32)
+        for i, label in enumerate(labels):
+            rows[i, [self.vocab[self.term(term)] for term in lexicon[label]]] = 1
+        return l2_normalize(self.weigh(rows)[:, self.lexicon_columns(lexicon)])
+
+class EmbeddingClassifier(CentroidClassifier):
+    def __init__(self):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError("CLASSIFIER=embedding requires `pip install sentence-transformers`") from e
+        self.model = SentenceTransformer(CLASSIFIER_EMBEDDING_MODEL, device="cpu")
+        super().__init__()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        # The model only reads the first few hundred tokens; don't tokenize whole articles
+        texts = [text[:2000] for text in texts]
+        return self.model.encode(texts, batch_size=len(texts), normalize_embeddings=True, convert_to_numpy=True)
+
+    def label_centroids(self, labels: List[str], lexicon: dict) -> np.ndarray:
+        return l2_normalize(np.stack([self.embed(lexicon[label]).mean(axis=0) for label in labels]))
+
+CLASSIFIERS = {"tfidf": TfidfClassifier, "embedding": EmbeddingClassifier}
+
+centroid_classifier = None
+centroid_classifier_lock = threading.Lock()
+
+def get_centroid_classifier() -> CentroidClassifier:
+    global centroid_classifier
+    if centroid_classifier is None:
+        with centroid_classifier_lock:
+            if centroid_classifier is None:
+                centroid_classifier = CLASSIFIERS[CLASSIFIER]()
+    return centroid_classifier
+
+classifier_batcher = MicroBatcher(
+    lambda texts: get_centroid_classifier().classify_batch(texts),
+    CLASSIFIER_MAX_BATCH_SIZE,
+    CLASSIFIER_MAX_WAIT_MS / 1000,
+    executor="classify",
+)
+
+@app.on_event("startup")
+async def startup_classifier():
+    if CLASSIFIER != "keyword":
+        classifier_batcher.start()
+        await run_in_executor("classify", get_centroid_classifier)
+
+@app.on_event("shutdown")
+async def shutdown_classifier():
+    await classifier_batcher.stop()
+
+async def classify_article(text: str):
+    if CLASSIFIER == "keyword":
+        return infer_country_category(text)
+    return await classifier_batcher.submit(text)
+
+# Token-aware chunking on sentence boundaries, shared by both summarizers
+SUMMARY_MAP_REDUCE = os.getenv("SUMMARY_MAP_REDUCE", "1") == "1"
+BART_CHUNK_TOKENS = int(os.getenv("BART_CHUNK_TOKENS", 900))  # BART reads at most 1024 tokens
+DEEPSEEK_MAX_PROMPT_TOKENS = int(os.getenv("DEEPSEEK_MAX_PROMPT_TOKENS", 12000))
+DEEPSEEK_MAX_CHUNKS = int(os.getenv("DEEPSEEK_MAX_CHUNKS", 8))  # longer articles are summarized from their first chunks
+DEEPSEEK_MAP_CONCURRENCY = int(os.getenv("DEEPSEEK_MAP_CONCURRENCY", 4))  # chunk calls in flight, across all articles
+
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+tokenizer = None
+tokenizer_lock = threading.Lock()
+
+def get_tokenizer():
+    global tokenizer
+    if tokenizer is None:
+        with tokenizer_lock:
+            if tokenizer is None:
+                if fallback_summarizer is not None:
+                    tokenizer = fallback_summarizer.tokenizer
+                else:
+                    from transformers import AutoTokenizer
+                    tokenizer = AutoTokenizer.from_pretrained(BART_MODEL)
+    return tokenizer
+
+# DeepSeek's budget is checked with an estimate instead, so that path never loads
+# transformers: about 3 ASCII characters per token (English averages nearer 4) and a
+# whole token for every other character (DeepSeek counts roughly 0.6 per CJK character)
+def estimate_tokens(text: str) -> int:
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return -(-ascii_chars // 3) + len(text) - ascii_chars
+
+def chunk_text(text: str, max_tokens: int, estimate: bool = False) -> List[str]:
+    # BART's byte-level BPE never has more tokens than bytes, so short ASCII texts skip the
+    # tokenizer; other scripts take several tokens per character
+    short = estimate_tokens(text) <= max_tokens if estimate else text.isascii() and len(text) <= max_tokens
+    if short:
+        return [text] if text.strip() else []
+
+    sentences = [sentence.strip() for sentence in SENTENCE_RE.split(text) if sentence.strip()]
+    if estimate:
+        lengths = [estimate_tokens(sentence) for sentence in sentences]
+    else:
+        tokenizer = get_tokenizer()
+        lengths = [len(ids) for ids in tokenizer(sentences, add_special_tokens=False)["input_ids"]]
+
+    chunks, current, current_tokens = [], [], 0
+    for sentence, length in zip(sentences, lengths):
+        if current and current_tokens + length > max_tokens:
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+        if length > max_tokens:
+            # A single sentence longer than a chunk: split it on token (or character) boundaries
+            if estimate:
+                step = max(1, len(sentence) * max_tokens // length)
+                chunks.extend(sentence[i:i + step] for i in range(0, len(sentence), step))
+            else:
+                ids = tokenizer(sentence, add_special_tokens=False)["input_ids"]
+                chunks.extend(tokenizer.decode(ids[i:i + max_tokens]) for i in range(0, len(ids), max_tokens))
+            continue
+        current.append(sentence)
+        current_tokens += length + 1  # +1 for the joining space
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+async def chunk_text_async(text: str, max_tokens: int, estimate: bool = False) -> List[str]:
+    return await run_in_executor("text", chunk_text, text, max_tokens, estimate)
+
+# Circuit breaker around DeepSeek: opens when too many recent calls failed or were slow,
+# sends summaries straight to BART while open, then lets a few probe calls through
+# (half-open) and closes again once they all succeed
+DEEPSEEK_BREAKER_WINDOW = float(os.getenv("DEEPSEEK_BREAKER_WINDOW", 60))  # seconds of calls considered
+DEEPSEEK_BREAKER_MIN_CALLS = int(os.getenv("DEEPSEEK_BREAKER_MIN_CALLS", 10))
+DEEPSEEK_BREAKER_ERROR_RATE = float(os.getenv("DEEPSEEK_BREAKER_ERROR_RATE", 0.5))
+DEEPSEEK_BREAKER_SLOW_SECONDS = float(os.getenv("DEEPSEEK_BREAKER_SLOW_SECONDS", 30))
+DEEPSEEK_BREAKER_SLOW_RATE = float(os.getenv("DEEPSEEK_BREAKER_SLOW_RATE", 0.5))
+DEEPSEEK_BREAKER_OPEN_SECONDS = float(os.getenv("DEEPSEEK_BREAKER_OPEN_SECONDS", 30))
+DEEPSEEK_BREAKER_PROBES = int(os.getenv("DEEPSEEK_BREAKER_PROBES", 3))
+DEEPSEEK_HEDGE_AFTER = float(os.getenv("DEEPSEEK_HEDGE_AFTER", 0))  # seconds before BART is raced against DeepSeek; 0 disables
+
+CIRCUIT_STATE = Gauge(
+    "news_circuit_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)", ["upstream"], multiprocess_mode="livemax"
+)
+HEDGES = MetricCounter("news_summary_hedges_total", "Slow DeepSeek calls raced against BART, by winner", ["winner"])
+
+class CircuitBreaker:
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+    def __init__(self, name: str, window: float, min_calls: int, error_rate: float,
+                 slow_seconds: float, slow_rate: float, open_seconds: float, probes: int):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_seconds = slow_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.probes = probes
+        self.calls = deque()  # (finished_at, failed, slow)
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.probe_successes = 0
+        self._transition(self.CLOSED)
+
+    def available(self) -> bool:
+        """Whether calls may be attempted, without taking a half-open probe slot."""
+        if self.state == self.OPEN:
+            return time.monotonic() - self.opened_at >= self.open_seconds
+        return self.state == self.CLOSED or self.probes_in_flight < self.probes
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                return False
+            self._transition(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self.probes_in_flight >= self.probes:
+                return False
+            self.probes_in_flight += 1
+        return True
+
+    def finish(self, success, seconds: float):
+        """Record an allowed call's outcome; success=None (cancelled) only frees its slot."""
+        if self.state == self.HALF_OPEN:
+            self.probes_in_flight = max(0, self.probes_in_flight - 1)
+            if success is None:
+                return
+            if not success or seconds >= self.slow_seconds:
+                self._open()
+                return
+            self.probe_successes += 1
+            if self.probe_successes >= self.probes:
+                self._transition(self.CLOSED)
+            return
+        if success is None or self.state == self.OPEN:
+            return  # cancelled, or started before the circuit opened
+
+        now = time.monotonic()
+        self.calls.append((now, not success, seconds >= self.slow_seconds))
+        while self.calls and self.calls[0][0] < now - self.window:
+            self.calls.popleft()
+        if len(self.calls) >= self.min_calls:
+            failed = sum(1 for _, failed, _ in self.calls if failed)
+            slow = sum(1 for _, _, slow in self.calls if slow)
+            if failed >= self.error_rate * len(self.calls) or slow >= self.slow_rate * len(self.calls):
+                self._open()
+
+    def _open(self):
+        self.opened_at = time.monotonic()
+        self._transition(self.OPEN)
+        print(f"{self.name} circuit open for {self.open_seconds:.0f}s")
+
+    def _transition(self, state: str):
+        self.state = state
+        self.calls.clear()
+        self.probes_in_flight = 0
+        self.probe_successes = 0
+        CIRCUIT_STATE.labels(self.name).set({self.CLOSED: 0, self.HALF_OPEN: 1, self.OPEN: 2}[state])
+
+deepseek_breaker = CircuitBreaker(
+    "deepseek", DEEPSEEK_BREAKER_WINDOW, DEEPSEEK_BREAKER_MIN_CALLS, DEEPSEEK_BREAKER_ERROR_RATE,
+    DEEPSEEK_BREAKER_SLOW_SECONDS, DEEPSEEK_BREAKER_SLOW_RATE, DEEPSEEK_BREAKER_OPEN_SECONDS, DEEPSEEK_BREAKER_PROBES,
+)
+
 # DeepSeek summarizer
+def deepseek_payload(text: str, stream: bool = False) -> dict:
+    return {"model": DEEPSEEK_MODEL, "stream": stream, "messages": [
+        {"role": "user", "content": f"Summarize this news article:\n\n{text}"}
+    ]}
+
 async def summarize_with_deepseek(text: str) -> str:
-    async with httpx.AsyncClient(timeout=60) as client:
-        try:
+    if not deepseek_breaker.allow():
+        return None
+    client = get_http_client("deepseek")
+    start = time.monotonic()
+    success = None  # stays None if the call is cancelled
+    try:
+        with track_stage("deepseek"):
             response = await client.post(
                 DEEPSEEK_URL,
                 headers={"Authorization": f"Bearer {DEEPSEEK_API_KEY}"},
-                json={"model": DEEPSEEK_MODEL, "messages": [
-                    {"role": "user", "content": f"Summarize this news article:\n\n{text}"}
-                ]}
+                json=deepseek_payload(text)
             )
             result = response.json()
-            if response.status_code == 200 and "choices" in result:
-                return result["choices"][0]["message"]["content"].strip()
-        except Exception as e:
-            print(f"DeepSeek error: {str(e)}")
+        success = response.status_code == 200 and "choices" in result
+        if success:
+            return result["choices"][0]["message"]["content"].strip()
+        record_error("deepseek", f"HTTP {response.status_code}")
+    except Exception as e:
+        success = False
+        print(f"DeepSeek error: {str(e)}")
+    finally:
+        deepseek_breaker.finish(success, time.monotonic() - start)
     return None  # fail gracefully
 
-# BART fallback
-def summarize_with_bart(text: str) -> str:
+deepseek_map_slots = asyncio.Semaphore(DEEPSEEK_MAP_CONCURRENCY)
+
+async def summarize_chunk(chunk: str, failed: asyncio.Event) -> str:
+    async with deepseek_map_slots:
+        # After one failure the article falls back anyway: don't spend (or fail) more calls
+        if failed.is_set():
+            return None
+        summary = await summarize_with_deepseek(chunk)
+    if not summary:
+        failed.set()
+    return summary
+
+# Fit an article into DeepSeek's prompt budget: summarize up to DEEPSEEK_MAX_CHUNKS chunks
+# (at most DEEPSEEK_MAP_CONCURRENCY calls at a time) and then summarize the summaries
+# (map-reduce) once; truncate when map-reduce is off or the summaries still don't fit.
+# Returns None if any DeepSeek call fails.
+async def deepseek_input(text: str, reduce: bool = False) -> str:
+    try:
+        chunks = await chunk_text_async(text, DEEPSEEK_MAX_PROMPT_TOKENS, estimate=True)
+    except Exception as e:
+        record_error("chunking", e)
+        print(f"Chunking error: {str(e)}")
+        # Never send the article uncapped; DeepSeek counts fewer tokens than characters
+        return text[:DEEPSEEK_MAX_PROMPT_TOKENS]
+    if len(chunks) <= 1:
+        return text
+    if not SUMMARY_MAP_REDUCE or reduce:
+        return chunks[0]
+    failed = asyncio.Event()
+    partials = await asyncio.gather(*(summarize_chunk(chunk, failed) for chunk in chunks[:DEEPSEEK_MAX_CHUNKS]))
+    if not all(partials):
+        return None
+    return await deepseek_input("\n\n".join(partials), reduce=True)
+
+# Streaming variant: yields content deltas from DeepSeek's server-sent events; raises on failure
+async def stream_with_deepseek(text: str):
+    client = get_http_client("deepseek")
+    async with client.stream(
+        "POST",
+        DEEPSEEK_URL,
+        headers={"Authorization": f"Bearer {DEEPSEEK_API_KEY}"},
+        json=deepseek_payload(text, stream=True)
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            delta = json.loads(data)["choices"][0]["delta"].get("content")
+            if delta:
+                yield delta
+
+# BART fallback (chunks from concurrent requests are batched into one model call)
+def run_bart_batch(chunks: List[str]) -> List[str]:
+    outputs = get_fallback_summarizer()(chunks, batch_size=len(chunks), truncation=True, **BART_GENERATION_PARAMS)
+    return [output['summary_text'] for output in outputs]
+
+bart_batcher = MicroBatcher(run_bart_batch, BART_MAX_BATCH_SIZE, BART_MAX_WAIT_MS / 1000, max_in_flight=INFERENCE_WORKERS)
+
+@app.on_event("startup")
+async def startup_bart_batcher():
+    if SUMMARIZER_MODE == "service":
+        return  # the model lives in the summarizer service processes
+    bart_batcher.start()
+    if FALLBACK_WARMUP:
+        asyncio.create_task(warmup_fallback_summarizer())
+
+async def warmup_fallback_summarizer():
+    try:
+        await run_in_executor("inference", get_fallback_summarizer)
+    except Exception as e:
+        print(f"BART warmup error: {str(e)}")
+
+@app.on_event("shutdown")
+async def shutdown_bart_batcher():
+    await bart_batcher.stop()
+
+async def summarize_with_bart(text: str) -> str:
     try:
-        chunks = [text[i:i+1024] for i in range(0, len(text), 1024)]
-        summaries = [fallback_summarizer(chunk, max_length=150, min_length=30, do_sample=False)[0]['summary_text']
-                     for chunk in chunks[:3]]
+        chunks = await chunk_text_async(text, BART_CHUNK_TOKENS)
+        if SUMMARIZER_MODE == "service":
+            summaries = await summarizer_client.summarize(chunks)
+        else:
+            summaries = await asyncio.gather(*(bart_batcher.submit(chunk) for chunk in chunks))
+        if len(summaries) > 1 and SUMMARY_MAP_REDUCE:
+            return await summarize_with_bart(" ".join(summaries))
         return " ".join(summaries)
     except Exception as e:
+        record_error("bart", e)
         print(f"BART error: {str(e)}")
         return "Summary unavailable."
 
+# Summarization service: with SUMMARIZER_MODE=service the fallback model runs in separate
+# processes (`python cli.py summarizer-service`), each listening on a Unix socket in
+# SUMMARIZER_SOCKET_DIR. Messages are 4-byte length-prefixed JSON; requests
+# {"id", "texts"} are answered with {"id", "summaries"} or {"id", "error"}, in any order.
+SUMMARIZER_MODE = os.getenv("SUMMARIZER_MODE", "inprocess")  # "inprocess" or "service"
+SUMMARIZER_SOCKET_DIR = os.getenv("SUMMARIZER_SOCKET_DIR", "/tmp/news-summarizer")
+SUMMARIZER_TIMEOUT = float(os.getenv("SUMMARIZER_TIMEOUT", 300))
+
+async def read_frame(reader: asyncio.StreamReader):
+    try:
+        header = await reader.readexactly(4)
+        return json.loads(await reader.readexactly(int.from_bytes(header, "big")))
+    except asyncio.IncompleteReadError:
+        return None  # connection closed
+
+def write_frame(writer: asyncio.StreamWriter, message: dict):
+    body = json.dumps(message).encode("utf-8")
+    writer.write(len(body).to_bytes(4, "big") + body)
+
+# Service side: one process per socket; requests from every connection share the batcher
+async def serve_summarizer(socket_path: str, stop: asyncio.Event):
+    bart_batcher.start()
+
+    async def handle(reader, writer):
+        tasks = set()
+        write_lock = asyncio.Lock()
+
+        async def respond(request):
+            try:
+                summaries = await asyncio.gather(*(bart_batcher.submit(text) for text in request["texts"]))
+                reply = {"id": request["id"], "summaries": summaries}
+            except Exception as e:
+                reply = {"id": request["id"], "error": str(e)}
+            async with write_lock:
+                write_frame(writer, reply)
+                await writer.drain()
+
+        try:
+            while True:
+                request = await read_frame(reader)
+                if request is None:
+                    break
+                task = asyncio.create_task(respond(request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = await asyncio.start_unix_server(handle, path=socket_path)
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        await bart_batcher.stop()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+class SummarizerConnection:
+    def __init__(self, path: str):
+        self.path = path
+        self.reader = None
+        self.writer = None
+        self.pending = {}  # request id -> future
+        self.task = None
+        self.write_lock = asyncio.Lock()
+
+    @property
+    def closed(self) -> bool:
+        return self.task is None or self.task.done()
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_unix_connection(self.path)
+        self.task = asyncio.create_task(self._read_replies())
+
+    async def request(self, texts: List[str]) -> List[str]:
+        if self.closed:
+            raise ConnectionError(f"Summarizer service at {self.path} disconnected")
+        request_id = uuid.uuid4().hex
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        try:
+            async with self.write_lock:
+                write_frame(self.writer, {"id": request_id, "texts": texts})
+                await self.writer.drain()
+            return await asyncio.wait_for(future, SUMMARIZER_TIMEOUT)
+        finally:
+            self.pending.pop(request_id, None)
+
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        if self.writer is not None:
+            self.writer.close()
+
+    async def _read_replies(self):
+        try:
+            while True:
+                reply = await read_frame(self.reader)
+                if reply is None:
+                    break
+                future = self.pending.get(reply["id"])
+                if future is None or future.done():
+                    continue
+                if "error" in reply:
+                    future.set_exception(RuntimeError(f"Summarizer service error: {reply['error']}"))
+                else:
+                    future.set_result(reply["summaries"])
+        except (OSError, ValueError) as e:
+            print(f"Summarizer service error: {str(e)}")
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(f"Summarizer service at {self.path} disconnected"))
+
+# Client side: connects to every socket in the directory and sends each request to the
+# service process with the fewest requests outstanding
+class SummarizerClient:
+    def __init__(self, socket_dir: str):
+        self.socket_dir = socket_dir
+        self.connections = {}  # socket path -> SummarizerConnection
+        self.refreshed_at = 0.0
+        self.lock = asyncio.Lock()
+
+    async def refresh(self):
+        async with self.lock:
+            self.refreshed_at = time.monotonic()
+            for path, connection in list(self.connections.items()):
+                if connection.closed:
+                    await connection.close()
+                    del self.connections[path]
+            try:
+                paths = [os.path.join(self.socket_dir, name) for name in os.listdir(self.socket_dir) if name.endswith(".sock")]
+            except OSError:
+                paths = []
+            for path in paths:
+                if path in self.connections:
+                    continue
+                connection = SummarizerConnection(path)
+                try:
+                    await connection.connect()
+                except OSError:
+                    continue  # stale socket from a stopped process
+                self.connections[path] = connection
+
+    def live_connections(self) -> list:
+        return [connection for connection in self.connections.values() if not connection.closed]
+
+    async def summarize(self, texts: List[str]) -> List[str]:
+        for attempt in range(2):
+            if not self.live_connections() or time.monotonic() - self.refreshed_at > 10:
+                await self.refresh()
+            connections = self.live_connections()
+            if not connections:
+                raise RuntimeError(f"No summarizer service listening in {self.socket_dir}")
+            connection = min(connections, key=lambda c: len(c.pending))
+            try:
+                return await connection.request(texts)
+            except (ConnectionError, OSError):
+                if attempt:
+                    raise
+                await self.refresh()  # that process went away: retry on another one
+
+    async def close(self):
+        for connection in self.connections.values():
+            await connection.close()
+        self.connections.clear()
+
+summarizer_client = SummarizerClient(SUMMARIZER_SOCKET_DIR)
+
+@app.on_event("shutdown")
+async def shutdown_summarizer_client():
+    await summarizer_client.close()
+
+# Summary cache: in-memory LRU with an optional SQLite tier that survives restarts
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", 10000))
+SUMMARY_CACHE_DB = os.getenv("SUMMARY_CACHE_DB")  # e.g. "summaries.db"; unset disables the disk tier
+SUMMARY_CACHE_DB_MAX_ROWS = int(os.getenv("SUMMARY_CACHE_DB_MAX_ROWS", 200000))  # 0 disables the row cap
+SUMMARY_CACHE_DB_MAX_AGE = float(os.getenv("SUMMARY_CACHE_DB_MAX_AGE", 30 * 86400))  # seconds; 0 disables the age cap
+
+DEEPSEEK_SUMMARIZER_ID = f"deepseek:{DEEPSEEK_MODEL}:{DEEPSEEK_MAX_PROMPT_TOKENS}:{int(SUMMARY_MAP_REDUCE)}"
+BART_SUMMARIZER_ID = (
+    f"bart:{BART_MODEL}:{SUMMARIZER_BACKEND}:{BART_CHUNK_TOKENS}:{int(SUMMARY_MAP_REDUCE)}:"
+    f"{json.dumps(BART_GENERATION_PARAMS, sort_keys=True)}"
+)
+
+class LRUCache:
+    def __init__(self, maxsize: int, ttl: float = None, name: str = "cache"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.data.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self.data.move_to_end(key)
+                self.hits += 1
+                CACHE_REQUESTS.labels(self.name, "hit").inc()
+                return value
+            del self.data[key]
+        self.misses += 1
+        CACHE_REQUESTS.labels(self.name, "miss").inc()
+        return None
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        self.data[key] = (value, expires_at)
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def discard(self, key):
+        self.data.pop(key, None)
+
+    def stats(self) -> dict:
+        return {"size": len(self.data), "hits": self.hits, "misses": self.misses}
+
+# Disk tier; its methods block on SQLite, so async code calls them through a thread.
+# Every PRUNE_EVERY writes, rows older than max_age and the oldest beyond max_rows are deleted.
+class SQLiteCache:
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path: str, max_rows: int = 0, max_age: float = 0):
+        self.path = path
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self.writes = 0
+        self.lock = threading.Lock()
+        self.pid = None
+        self.conn = None
+        self.connection()
+
+    # SQLite connections must not cross a fork, so each worker process opens its own
+    def connection(self):
+        if self.pid != os.getpid():
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS cache_created_at ON cache (created_at)")
+            self.conn.commit()
+            self.pid = os.getpid()
+        return self.conn
+
+    def get(self, key):
+        with self.lock:
+            row = self.connection().execute(
+                "SELECT value FROM cache WHERE key = ? AND created_at >= ?", (key, self.oldest())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value):
+        with self.lock:
+            conn = self.connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+            conn.commit()
+            self.writes += 1
+            if (self.writes - 1) % self.PRUNE_EVERY == 0:  # also on the first write after startup
+                self._prune(conn)
+
+    def oldest(self) -> float:
+        return time.time() - self.max_age if self.max_age else 0
+
+    def _prune(self, conn):
+        conn.execute("DELETE FROM cache WHERE created_at < ?", (self.oldest(),))
+        if self.max_rows:
+            conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,),
+            )
+        conn.commit()
+
+class SummaryCache:
+    def __init__(self, maxsize: int, path: str = None):
+        self.memory = LRUCache(maxsize, name="summaries")
+        self.disk = SQLiteCache(path, SUMMARY_CACHE_DB_MAX_ROWS, SUMMARY_CACHE_DB_MAX_AGE) if path else None
+
+    async def get(self, key):
+        value = self.memory.get(key)
+        if value is None and self.disk:
+            value = await asyncio.to_thread(self.disk.get, key)
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    async def set(self, key, value):
+        self.memory.set(key, value)
+        if self.disk:
+            await asyncio.to_thread(self.disk.set, key, value)
+
+summary_cache = SummaryCache(SUMMARY_CACHE_SIZE, SUMMARY_CACHE_DB)
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+# Summarize with DeepSeek, falling back to BART; results are cached per summarizer.
+# Yields "summary_delta" events while DeepSeek streams (stream=True) and always ends
+# with a "summary" event holding the final text.
+async def summarize_events(text: str, stream: bool = False):
+    text_hash = content_hash(text)
+
+    deepseek_key = f"{DEEPSEEK_SUMMARIZER_ID}:{text_hash}"
+    summary = await summary_cache.get(deepseek_key)
+    if summary:
+        SUMMARIES.labels("cache").inc()
+        yield {"event": "summary", "summary": summary}
+        return
+
+    source = "deepseek"
+    if not deepseek_breaker.available():
+        summary = None  # circuit open: go straight to the fallback
+    elif stream:
+        prompt_text = await deepseek_input(text)
+        summary = None
+        if prompt_text is not None and deepseek_breaker.allow():
+            parts = []
+            start = time.monotonic()
+            success = None
+            try:
+                with track_stage("deepseek_stream"):
+                    async for delta in stream_with_deepseek(prompt_text):
+                        parts.append(delta)
+                        yield {"event": "summary_delta", "text": delta}
+                summary = "".join(parts).strip()
+                success = bool(summary)
+            except Exception as e:
+                success = False
+                print(f"DeepSeek error: {str(e)}")
+            finally:
+                deepseek_breaker.finish(success, time.monotonic() - start)
+    elif DEEPSEEK_HEDGE_AFTER > 0:
+        source, summary = await hedged_summary(text, text_hash)
+    else:
+        summary = await deepseek_summary(text)
+    if summary and source == "deepseek":
+        SUMMARIES.labels("deepseek").inc()
+        await summary_cache.set(deepseek_key, summary)
+    if summary:
+        yield {"event": "summary", "summary": summary}
+        return
+
+    yield {"event": "summary", "summary": await bart_summary(text, text_hash)}
+
+async def deepseek_summary(text: str) -> str:
+    prompt_text = await deepseek_input(text)
+    if prompt_text is None:
+        return None
+    return await summarize_with_deepseek(prompt_text)
+
+async def bart_summary(text: str, text_hash: str) -> str:
+    bart_key = f"{BART_SUMMARIZER_ID}:{text_hash}"
+    summary = await summary_cache.get(bart_key)
+    if summary:
+        SUMMARIES.labels("cache").inc()
+        return summary
+    with track_stage("bart"):
+        summary = await summarize_with_bart(text)
+    if summary != "Summary unavailable.":
+        SUMMARIES.labels("bart").inc()
+        await summary_cache.set(bart_key, summary)
+    else:
+        SUMMARIES.labels("unavailable").inc()
+    return summary
+
+# Hedging: once DeepSeek has used up DEEPSEEK_HEDGE_AFTER, start BART too and keep
+# whichever usable summary arrives first. Returns (source, summary).
+async def hedged_summary(text: str, text_hash: str) -> tuple:
+    deepseek_task = asyncio.create_task(deepseek_summary(text))
+    bart_task = None
+    try:
+        done, _ = await asyncio.wait({deepseek_task}, timeout=DEEPSEEK_HEDGE_AFTER)
+        if done:
+            return "deepseek", deepseek_task.result()
+        bart_task = asyncio.create_task(bart_summary(text, text_hash))
+        done, _ = await asyncio.wait({deepseek_task, bart_task}, return_when=asyncio.FIRST_COMPLETED)
+        if deepseek_task in done and deepseek_task.result():
+            HEDGES.labels("deepseek").inc()
+            return "deepseek", deepseek_task.result()
+        summary = await bart_task
+        if summary == "Summary unavailable." and not deepseek_task.done():
+            # BART failed while DeepSeek is still running: give DeepSeek the chance to finish
+            late_summary = await deepseek_task
+            if late_summary:
+                HEDGES.labels("deepseek").inc()
+                return "deepseek", late_summary
+        HEDGES.labels("bart").inc()
+        return "bart", summary
+    finally:
+        for task in (deepseek_task, bart_task):
+            if task is not None and not task.done():
+                task.cancel()
+
+async def summarize(text: str) -> str:
+    async for event in summarize_events(text):
+        if event["event"] == "summary":
+            return event["summary"]
+
+# URL canonicalization: drop tracking params, AMP variants and cosmetic differences
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "ref", "ref_src", "cmpid", "ocid", "smid", "spm", "amp", "outputtype",
+}
+TRACKING_PARAM_PREFIXES = ("utm_",)
+
+def canonicalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if host.startswith("amp."):
+        host = host[len("amp."):]
+    if ":" in host:
+        host = f"[{host}]"  # IPv6 literal: hostname drops the brackets
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+
+    segments = [segment for segment in parts.path.split("/") if segment]
+    if segments and segments[-1] == "amp":
+        segments.pop()
+    elif segments and segments[0] == "amp":
+        segments.pop(0)
+    if segments and segments[-1].endswith(".amp.html"):
+        segments[-1] = segments[-1][:-len(".amp.html")] + ".html"
+    path = "/" + "/".join(segments)
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+def same_site(url: str, other: str) -> bool:
+    def site(u):
+        host = urlsplit(u).hostname or ""
+        return host[len("www."):] if host.startswith("www.") else host
+    return site(url) == site(other)
+
+# URL-level result cache
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", 50000))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", 6 * 3600))
+
+result_cache = LRUCache(RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL, name="results")
+
+# Seen-URL index: canonical URL -> Airtable record id, content hash and processing time,
+# kept in SQLite so resubmissions are skipped before download, across restarts. A Bloom
+# filter in front answers most "never seen" lookups without touching the database; it
+# picks up rows written by other processes every URL_INDEX_REFRESH seconds.
+URL_INDEX_DB = os.getenv("URL_INDEX_DB", "url_index.db")  # empty disables the index
+URL_INDEX_CAPACITY = int(os.getenv("URL_INDEX_CAPACITY", 1000000))
+URL_INDEX_REFRESH = float(os.getenv("URL_INDEX_REFRESH", 5))
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        # Double hashing: two 64-bit halves of one digest give every probe position
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little")
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+class URLIndex:
+    def __init__(self, path: str, capacity: int):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS urls ("
+            "url TEXT PRIMARY KEY, record_id TEXT, content_hash TEXT, processed_at REAL NOT NULL)"
+        )
+        self.bloom = BloomFilter(capacity)
+        self.last_rowid = 0
+        self.refreshed_at = 0.0
+        self._refresh()
+
+    def _refresh(self):
+        # Rows get a new rowid whenever they are written, so this also sees updates
+        with self.lock:
+            rows = self.conn.execute("SELECT rowid, url FROM urls WHERE rowid > ?", (self.last_rowid,)).fetchall()
+        for rowid, url in rows:
+            self.bloom.add(url)
+            self.last_rowid = max(self.last_rowid, rowid)
+        self.refreshed_at = time.monotonic()
+
+    def get(self, url: str):
+        if time.monotonic() - self.refreshed_at > URL_INDEX_REFRESH:
+            self._refresh()
+        if url not in self.bloom:
+            return None
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT record_id, content_hash, processed_at FROM urls WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"record_id": row[0], "content_hash": row[1], "processed_at": row[2]}
+
+    def add(self, urls: List[str], content_hash: str = None, record_id: str = None):
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO urls (url, record_id, content_hash, processed_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET record_id = COALESCE(excluded.record_id, record_id), "
+                "content_hash = COALESCE(excluded.content_hash, content_hash), processed_at = excluded.processed_at",
+                [(url, record_id, content_hash, now) for url in urls],
+            )
+        for url in urls:
+            self.bloom.add(url)
+
+    def record_ids(self, urls: List[str]) -> dict:
+        """{url: record id} for the given urls that have one, in a single query."""
+        urls = [url for url in urls if url in self.bloom]
+        if not urls:
+            return {}
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT url, record_id FROM urls WHERE record_id IS NOT NULL AND url IN ({','.join('?' * len(urls))})",
+                urls,
+            ).fetchall()
+        return dict(rows)
+
+    def remove(self, urls: List[str]):
+        # The Bloom filter keeps them; a false positive only costs the exact lookup
+        with self.lock:
+            self.conn.executemany("DELETE FROM urls WHERE url = ?", [(url,) for url in urls])
+
+    def set_record_ids(self, record_ids: dict):
+        """Attach Airtable record ids ({canonical url: record id}) once records are created."""
+        with self.lock:
+            self.conn.executemany(
+                "UPDATE urls SET record_id = ? WHERE url = ?", [(record_id, url) for url, record_id in record_ids.items()]
+            )
+
+    def import_records(self, rows: list):
+        """Bulk-load (canonical url, record id, processed_at) rows, keeping existing content hashes."""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.executemany(
+                "INSERT INTO urls (url, record_id, processed_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET record_id = excluded.record_id",
+                rows,
+            )
+            self.conn.execute("COMMIT")
+        for url, _, _ in rows:
+            self.bloom.add(url)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"size": self.conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]}
+
+url_index = None
+url_index_lock = threading.Lock()
+
+def get_url_index():
+    global url_index
+    if url_index is None and URL_INDEX_DB:
+        with url_index_lock:
+            if url_index is None:
+                url_index = URLIndex(URL_INDEX_DB, URL_INDEX_CAPACITY)
+    return url_index
+
+# Near-duplicate detection: MinHash signatures over word shingles, indexed with LSH
+# banding so a lookup only compares against articles sharing at least one band.
+# The index lives in memory and is snapshotted to disk periodically and on shutdown.
+# Each process writes its own snapshot (<path>.<pid>); a starting process merges all of
+# them and takes over the ones left by processes that are no longer running.
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "1") == "1"
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.8))  # estimated Jaccard similarity
+DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", 5))  # words per shingle
+DEDUP_NUM_PERM = 128
+DEDUP_BANDS = 16  # 16 bands of 8 rows: pairs above ~0.7 similarity almost always share a band
+DEDUP_MAX_DOCS = int(os.getenv("DEDUP_MAX_DOCS", 100000))
+DEDUP_SNAPSHOT_PATH = os.getenv("DEDUP_SNAPSHOT_PATH", "dedup_index.npz")  # empty disables snapshots
+DEDUP_SNAPSHOT_INTERVAL = float(os.getenv("DEDUP_SNAPSHOT_INTERVAL", 300))
+DEDUP_DUPLICATES = os.getenv("DEDUP_DUPLICATES", "skip")  # "skip" (no new Airtable row) or "link"
+
+MINHASH_PRIME = (1 << 61) - 1
+
+DUPLICATES = MetricCounter("news_duplicates_total", "Articles matched to a near-duplicate already processed")
+
+class MinHashLSH:
+    def __init__(self, num_perm: int, bands: int, threshold: float, shingle_size: int, max_docs: int):
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.max_docs = max_docs
+        # Hash family (a * x + b) mod p; a, b < 2^32 keep a * x + b inside uint64 for 32-bit x
+        rng = np.random.RandomState(1)
+        self.a = rng.randint(1, 1 << 32, num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 32, num_perm, dtype=np.uint64)
+        self.docs = OrderedDict()  # doc id -> (signature, payload), oldest first
+        self.buckets = [{} for _ in range(bands)]  # band hash -> set of doc ids
+        self.dirty = False
+        self.worker = None
+
+    def signature(self, text: str) -> np.ndarray:
+        words = normalize_text(text).split()
+        size = min(self.shingle_size, len(words)) or 1
+        shingles = {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        values = ((np.outer(self.a, hashes) + self.b[:, None]) % MINHASH_PRIME) & np.uint64(0xFFFFFFFF)
+        return values.min(axis=1).astype(np.uint32)
+
+    def band_keys(self, signature: np.ndarray) -> list:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def query(self, signature: np.ndarray, exclude: str = None):
+        """Return (payload, similarity) of the closest indexed article above the threshold, or None."""
+        candidates = set()
+        for bucket, key in zip(self.buckets, self.band_keys(signature)):
+            candidates.update(bucket.get(key, ()))
+        candidates.discard(exclude)
+        best, best_similarity = None, self.threshold
+        for doc_id in candidates:
+            other, payload = self.docs[doc_id]
+            similarity = float(np.count_nonzero(other == signature)) / len(signature)
+            if similarity >= best_similarity:
+                best, best_similarity = payload, similarity
+        return (best, best_similarity) if best is not None else None
+
+    def insert(self, doc_id: str, signature: np.ndarray, payload: dict):
+        if doc_id in self.docs:
+            self.remove(doc_id)
+        self.docs[doc_id] = (signature, payload)
+        for bucket, key in zip(self.buckets, self.band_keys(signature)):
+            bucket.setdefault(key, set()).add(doc_id)
+        while len(self.docs) > self.max_docs:
+            self.remove(next(iter(self.docs)))
+        self.dirty = True
+
+    def remove(self, doc_id: str):
+        signature, _ = self.docs.pop(doc_id)
+        for bucket, key in zip(self.buckets, self.band_keys(signature)):
+            ids = bucket.get(key)
+            if ids:
+                ids.discard(doc_id)
+                if not ids:
+                    del bucket[key]
+
+    def stats(self) -> dict:
+        return {"size": len(self.docs)}
+
+    def load(self, path: str):
+        try:
+            with np.load(path, allow_pickle=False) as snapshot:
+                doc_ids = snapshot_json(snapshot["doc_ids"])
+                payloads = snapshot_json(snapshot["payloads"])
+                signatures = snapshot["signatures"]
+        except (OSError, ValueError, KeyError) as e:
+            if os.path.exists(path):
+                print(f"Dedup snapshot error: {str(e)}")
+            return
+        if signatures.shape[1:] != (len(self.a),):
+            return  # snapshot from a different configuration
+        for doc_id, signature, payload in zip(doc_ids, signatures, payloads):
+            self.insert(doc_id, signature, payload)
+        self.dirty = False
+
+    def snapshot_data(self, items: list = None) -> dict:
+        items = list(self.docs.items()) if items is None else items
+        signatures = np.array([signature for _, (signature, _) in items], dtype=np.uint32).reshape(-1, len(self.a))
+        # JSON kept as UTF-8 bytes: a numpy str array would store it as UCS-4 (4 bytes per char)
+        return {
+            "doc_ids": snapshot_bytes([doc_id for doc_id, _ in items]),
+            "payloads": snapshot_bytes([payload for _, (_, payload) in items]),
+            "signatures": signatures,
+        }
+
+    async def save(self, path: str):
+        # Only the entry list is copied on the event loop; signatures and payloads are never
+        # mutated after insert, so encoding and disk I/O happen in a thread
+        items = list(self.docs.items())
+        self.dirty = False
+        await asyncio.to_thread(lambda: write_snapshot(path, self.snapshot_data(items)))
+
+    def start(self, path: str, interval: float):
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self._run(path, interval))
+
+    async def stop(self):
+        if self.worker is None:
+            return
+        self.worker.cancel()
+        try:
+            await self.worker
+        except asyncio.CancelledError:
+            pass
+        self.worker = None
+
+    async def _run(self, path: str, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            if self.dirty:
+                try:
+                    await self.save(path)
+                except OSError as e:
+                    print(f"Dedup snapshot error: {str(e)}")
+
+def snapshot_bytes(value) -> np.ndarray:
+    return np.frombuffer(json.dumps(value).encode("utf-8"), dtype=np.uint8)
+
+def snapshot_json(array: np.ndarray):
+    # Older snapshots stored the JSON as a numpy str scalar
+    return json.loads(array.tobytes().decode("utf-8") if array.dtype == np.uint8 else str(array))
+
+def write_snapshot(path: str, data: dict):
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp.npz"
+    np.savez(tmp_path, **data)
+    os.replace(tmp_path, path)
+
+def dedup_snapshot_path() -> str:
+    return f"{DEDUP_SNAPSHOT_PATH}.{os.getpid()}"
+
+def load_dedup_snapshots(path: str) -> list:
+    """Merge every process's snapshot into dedup_index, oldest first; return the orphaned ones."""
+    directory, prefix = os.path.split(path)
+    snapshots = []
+    for name in os.listdir(directory or "."):
+        # <path> is a snapshot from a single-process setup; <path>.<pid> belongs to a process
+        match = re.fullmatch(re.escape(prefix) + r"(?:\.(\d+))?", name)
+        if match:
+            file_path = os.path.join(directory, name)
+            snapshots.append((os.path.getmtime(file_path), file_path, match.group(1)))
+    orphans = []
+    for _, file_path, owner in sorted(snapshots):
+        dedup_index.load(file_path)
+        if not owner or (int(owner) != os.getpid() and not pid_alive(int(owner))):
+            orphans.append(file_path)
+    return orphans
+
+dedup_index = MinHashLSH(DEDUP_NUM_PERM, DEDUP_BANDS, DEDUP_THRESHOLD, DEDUP_SHINGLE_SIZE, DEDUP_MAX_DOCS)
+
+@app.on_event("startup")
+async def startup_dedup_index():
+    if DEDUP_ENABLED and DEDUP_SNAPSHOT_PATH:
+        orphans = await asyncio.to_thread(load_dedup_snapshots, DEDUP_SNAPSHOT_PATH)
+        if orphans:
+            # Save what was taken over under our own name before dropping the orphans
+            try:
+                await dedup_index.save(dedup_snapshot_path())
+                for orphan in orphans:
+                    os.remove(orphan)
+            except OSError as e:
+                print(f"Dedup snapshot error: {str(e)}")
+        dedup_index.start(dedup_snapshot_path(), DEDUP_SNAPSHOT_INTERVAL)
+
+@app.on_event("shutdown")
+async def shutdown_dedup_index():
+    await dedup_index.stop()
+    if DEDUP_ENABLED and DEDUP_SNAPSHOT_PATH and dedup_index.dirty:
+        try:
+            await dedup_index.save(dedup_snapshot_path())
+        except OSError as e:
+            print(f"Dedup snapshot error: {str(e)}")
+
 # Airtable saver
-async def save_to_airtable(record: dict):
-    url = f"https://api.airtable.com/v0/{AIRTABLE_BASE_ID}/{AIRTABLE_TABLE_NAME}"
-    headers = {
+AIRTABLE_WRITE_MODE = os.getenv("AIRTABLE_WRITE_MODE", "queue")  # "queue" (write-behind) or "sync"
+AIRTABLE_WRITE_STRATEGY = os.getenv("AIRTABLE_WRITE_STRATEGY", "insert")  # "insert" or "upsert" (one row per URL)
+AIRTABLE_BATCH_SIZE = 10  # Airtable's limit for multi-record creates
+AIRTABLE_FLUSH_INTERVAL = float(os.getenv("AIRTABLE_FLUSH_INTERVAL", 1))
+AIRTABLE_RATE_LIMIT = float(os.getenv("AIRTABLE_RATE_LIMIT", 5))  # requests/second per base
+AIRTABLE_MAX_RETRIES = int(os.getenv("AIRTABLE_MAX_RETRIES", 5))
+AIRTABLE_SPOOL_PATH = os.getenv("AIRTABLE_SPOOL_PATH", "airtable_spool.jsonl")
+AIRTABLE_DUPLICATE_FIELD = os.getenv("AIRTABLE_DUPLICATE_FIELD", "Duplicate Of")  # used when DEDUP_DUPLICATES=link
+
+def airtable_url() -> str:
+    return f"{AIRTABLE_API_URL}/{AIRTABLE_BASE_ID}/{AIRTABLE_TABLE_NAME}"
+
+def airtable_headers() -> dict:
+    return {
         "Authorization": f"Bearer {AIRTABLE_API_KEY}",
         "Content-Type": "application/json"
     }
-    payload = {
-        "fields": {
-            "URL": record["url"],
-            "Headline": record["title"],
-            "Date": record["date"],
-            "Country": record["country"],
-            "Category": record["category"],
-            "Summary": record["summary"]
-        }
+
+def airtable_fields(record: dict) -> dict:
+    fields = {
+        # Upserts merge on URL, so store the canonical form that all variants share
+        "URL": canonicalize_url(record["url"]) if AIRTABLE_WRITE_STRATEGY == "upsert" else record["url"],
+        "Headline": record["title"],
+        "Date": record["date"],
+        "Country": record["country"],
+        "Category": record["category"],
+        "Summary": record["summary"]
     }
+    if record.get("duplicate_of"):
+        fields[AIRTABLE_DUPLICATE_FIELD] = record["duplicate_of"]
+    return fields
+
+# Upsert body for PATCH: records whose id is in the URL index are updated by id directly;
+# the rest are matched on URL by Airtable, or created
+async def airtable_upsert_payload(records: list, use_known_ids: bool = True) -> dict:
+    index = get_url_index() if use_known_ids else None
+    urls = [canonicalize_url(fields["URL"]) for fields in records]
+    known = await asyncio.to_thread(index.record_ids, urls) if index else {}
+    entries = []
+    for url, fields in zip(urls, records):
+        if known.get(url):
+            entries.append({"id": known[url], "fields": fields})
+        else:
+            entries.append({"fields": fields})
+    return {"performUpsert": {"fieldsToMergeOn": ["URL"]}, "records": entries}
+
+def airtable_record_id(body: dict):
+    # Single creates return the record; upserts return {"records": [...]}
+    return body.get("id") or (body.get("records") or [{}])[0].get("id")
+
+async def save_to_airtable(record: dict):
+    fields = airtable_fields(record)
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            return await client.post(url, headers=headers, json=payload)
+        with track_stage("airtable"):
+            client = get_http_client("airtable")
+            if AIRTABLE_WRITE_STRATEGY != "upsert":
+                return await client.post(airtable_url(), headers=airtable_headers(), json={"fields": fields})
+            response = await client.patch(airtable_url(), headers=airtable_headers(), json=await airtable_upsert_payload([fields]))
+            if response.status_code in (404, 422):
+                # The indexed record id may be stale (row deleted): merge on URL instead
+                response = await client.patch(
+                    airtable_url(), headers=airtable_headers(), json=await airtable_upsert_payload([fields], use_known_ids=False)
+                )
+            return response
     except Exception as e:
         print(f"Airtable error: {str(e)}")
         return None
 
-# Article processor
-async def process_article(url: str):
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+# The Airtable limit is per base, not per process: with several workers the bucket state
+# lives in a small file that every process updates under an exclusive lock
+class SharedTokenBucket(TokenBucket):
+    def __init__(self, path: str, rate: float, capacity: float = None):
+        super().__init__(rate, capacity)
+        self.path = path
+
+    def _take(self) -> float:
+        """Take a token, or return how long to wait for one."""
+        with open(self.path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            now = time.time()
+            try:
+                tokens, updated = map(float, f.read().split())
+            except ValueError:
+                tokens, updated = self.capacity, now
+            tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            f.seek(0)
+            f.truncate()
+            f.write(f"{tokens} {now}")
+        return wait
+
+    async def acquire(self):
+        while True:
+            try:
+                wait = await asyncio.to_thread(self._take)
+            except OSError as e:
+                print(f"Rate limit file error: {str(e)}")
+                return await super().acquire()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+def airtable_bucket() -> TokenBucket:
+    if AIRTABLE_SPOOL_PATH:
+        return SharedTokenBucket(f"{AIRTABLE_SPOOL_PATH}.ratelimit", AIRTABLE_RATE_LIMIT)
+    return TokenBucket(AIRTABLE_RATE_LIMIT)
+
+AIRTABLE_PENDING = Gauge(
+    "news_airtable_pending_records", "Records waiting in the Airtable write-behind queue", multiprocess_mode="livesum"
+)
+
+# Write-behind queue: records are spooled to disk, then sent in batches of up to 10.
+# The spool is an append-only log of {"id", "fields"} and {"id", "done"} lines.
+# Each process keeps its own spool (<path>.<pid>) and takes over the spools of
+# processes that are no longer running, so several workers never send a record twice.
+class AirtableWriter:
+    def __init__(self, spool_path: str, bucket: TokenBucket, max_retries: int):
+        self.base_path = spool_path
+        self.spool_path = None
+        self.bucket = bucket
+        self.max_retries = max_retries
+        self.pending = OrderedDict()
+        self.index_keys = {}  # record id -> URL index keys to drop if Airtable rejects it
+        self.done_since_compaction = 0
+        self.spool = None
+        self.queue = None
+        self.worker = None
+        self.stopped = False
+
+    def start(self):
+        if self.worker is not None and not self.worker.done():
+            return
+        self.stopped = False
+        self.queue = asyncio.Queue()
+        self.spool_path = f"{self.base_path}.{os.getpid()}"
+        self._load_spool()
+        self._adopt_orphaned_spools()
+        for record_id in self.pending:
+            self.queue.put_nowait(record_id)
+        self.worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.worker is None:
+            return
+        self.worker.cancel()
+        try:
+            await self.worker
+        except asyncio.CancelledError:
+            pass
+        self.worker = None
+        self.stopped = True
+        self.spool.close()
+        self.spool = None
+        if not self.pending:
+            os.remove(self.spool_path)
+
+    def enqueue(self, record: dict, index_keys: List[str] = None) -> str:
+        record_id = uuid.uuid4().hex
+        fields = airtable_fields(record)
+        entry = {"id": record_id, "fields": fields, "keys": index_keys or [canonicalize_url(record["url"])]}
+        if self.stopped:
+            # Shutting down: leave it in the spool for the next start rather than restarting
+            with open(self.spool_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+            return record_id
+        self.start()
+        self.pending[record_id] = fields
+        self.index_keys[record_id] = entry["keys"]
+        AIRTABLE_PENDING.set(len(self.pending))
+        self._append(entry)
+        self.queue.put_nowait(record_id)
+        return record_id
+
+    def stats(self) -> dict:
+        return {"pending": len(self.pending)}
+
+    def _load_spool(self):
+        self.pending.clear()
+        self.index_keys.clear()
+        self._read_spool(self.spool_path)
+        self._compact()
+
+    def _read_spool(self, path: str):
+        if not os.path.exists(path):
+            return
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn write from a crash
+                if entry.get("done"):
+                    self.pending.pop(entry["id"], None)
+                    self.index_keys.pop(entry["id"], None)
+                else:
+                    self.pending[entry["id"]] = entry["fields"]
+                    # Spools written before keys were recorded: the record's own URL
+                    self.index_keys[entry["id"]] = entry.get("keys") or [canonicalize_url(entry["fields"]["URL"])]
+
+    def _adopt_orphaned_spools(self):
+        directory = os.path.dirname(self.base_path) or "."
+        prefix = os.path.basename(self.base_path)
+        for name in os.listdir(directory):
+            # <path> is a spool from a single-process setup; <path>.<pid>[.adopting] belong to a process
+            match = re.fullmatch(re.escape(prefix) + r"(?:\.(\d+)(?:\.adopting)?)?", name)
+            if not match:
+                continue
+            owner = match.group(1)
+            if owner and (int(owner) == os.getpid() or pid_alive(int(owner))):
+                continue
+            # Renaming claims the spool; if another process got there first, skip it
+            orphan = os.path.join(directory, name)
+            claimed = f"{self.spool_path}.adopting"
+            try:
+                os.rename(orphan, claimed)
+            except OSError:
+                continue
+            self._read_spool(claimed)
+            self._compact()
+            os.remove(claimed)
+
+
+    def _compact(self):
+        if self.spool:
+            self.spool.close()
+        tmp_path = f"{self.spool_path}.tmp"
+        with open(tmp_path, "w") as f:
+            for record_id, fields in self.pending.items():
+                f.write(json.dumps({"id": record_id, "fields": fields, "keys": self.index_keys[record_id]}) + "\n")
+        os.replace(tmp_path, self.spool_path)
+        self.spool = open(self.spool_path, "a")
+        self.done_since_compaction = 0
+        AIRTABLE_PENDING.set(len(self.pending))
+
+    def _append(self, entry: dict):
+        self.spool.write(json.dumps(entry) + "\n")
+        self.spool.flush()
+
+    def _mark_done(self, record_ids: list):
+        for record_id in record_ids:
+            self.pending.pop(record_id, None)
+            self.index_keys.pop(record_id, None)
+            self._append({"id": record_id, "done": True})
+        AIRTABLE_PENDING.set(len(self.pending))
+        self.done_since_compaction += len(record_ids)
+        if self.done_since_compaction >= 1000:
+            self._compact()
+
+    async def _run(self):
+        while True:
+            batch = await collect_batch(self.queue, AIRTABLE_BATCH_SIZE, AIRTABLE_FLUSH_INTERVAL)
+            batch = [record_id for record_id in batch if record_id in self.pending]
+            if batch:
+                await self._send(batch)
+
+    async def _send(self, record_ids: list):
+        upsert = AIRTABLE_WRITE_STRATEGY == "upsert"
+        if upsert:
+            # One request can't upsert the same URL twice: only the newest version is sent
+            latest = {self.pending[record_id]["URL"]: record_id for record_id in record_ids}
+            self._mark_done([record_id for record_id in record_ids if latest[self.pending[record_id]["URL"]] != record_id])
+            record_ids = list(latest.values())
+        use_known_ids = True
+        for attempt in range(self.max_retries + 1):
+            records = [self.pending[record_id] for record_id in record_ids]
+            if upsert:
+                method, payload = "PATCH", await airtable_upsert_payload(records, use_known_ids)
+            else:
+                method, payload = "POST", {"records": [{"fields": fields} for fields in records]}
+            await self.bucket.acquire()
+            status = None
+            try:
+                with track_stage("airtable_batch"):
+                    response = await get_http_client("airtable").request(
+                        method, airtable_url(), headers=airtable_headers(), json=payload
+                    )
+            except httpx.HTTPError as e:
+                print(f"Airtable error: {str(e)}")
+            else:
+                status = response.status_code
+                if response.is_success:
+                    await self._index_record_ids(record_ids, response.json().get("records", []))
+                    self._mark_done(record_ids)
+                    return
+                record_error("airtable_batch", f"HTTP {status}")
+                if upsert and use_known_ids and status in (404, 422) and any("id" in entry for entry in payload["records"]):
+                    # An indexed record id may be stale (row deleted): retry merging on URL only
+                    use_known_ids = False
+                    continue
+                if status != 429 and status < 500:
+                    # Not retryable (bad fields, auth): move the records aside instead of blocking the queue
+                    print(f"Airtable rejected {len(record_ids)} records: {response.status_code} {response.text}")
+                    with open(f"{self.base_path}.failed", "a") as f:
+                        for record_id in record_ids:
+                            f.write(json.dumps({"id": record_id, "fields": self.pending[record_id]}) + "\n")
+                    # No row exists, so the URLs must not be answered "already_processed"
+                    keys = [key for record_id in record_ids for key in self.index_keys[record_id]]
+                    for key in keys:
+                        result_cache.discard(key)
+                    index = get_url_index()
+                    if index:
+                        await asyncio.to_thread(index.remove, keys)
+                    self._mark_done(record_ids)
+                    return
+                print(f"Airtable error: {status}")
+            # Airtable asks clients to back off for 30 seconds after a 429
+            delay = 30 if status == 429 else min(60, 2 ** attempt)
+            await asyncio.sleep(delay + random.uniform(0, 1))
+        # Still failing: leave the records spooled and try them again later
+        asyncio.get_running_loop().call_later(60, self._requeue, record_ids)
+
+    async def _index_record_ids(self, record_ids: list, records: list):
+        # Airtable returns created (or upserted) records in request order
+        index = get_url_index()
+        if index:
+            await asyncio.to_thread(index.set_record_ids, {
+                key: record["id"]
+                for record_id, record in zip(record_ids, records)
+                for key in self.index_keys[record_id]
+            })
+
+    def _requeue(self, record_ids: list):
+        for record_id in record_ids:
+            self.queue.put_nowait(record_id)
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+airtable_writer = AirtableWriter(AIRTABLE_SPOOL_PATH, airtable_bucket(), AIRTABLE_MAX_RETRIES)
+
+@app.on_event("startup")
+async def startup_airtable_writer():
+    if AIRTABLE_WRITE_MODE == "queue":
+        airtable_writer.start()
+
+@app.on_event("shutdown")
+async def shutdown_airtable_writer():
+    await airtable_writer.stop()
+
+# Load the index (and fill its Bloom filter) before the first request needs it
+@app.on_event("startup")
+async def startup_url_index():
+    await asyncio.to_thread(get_url_index)
+
+# Bulk backfill from the Airtable table (`python cli.py import-airtable`)
+async def import_airtable_index() -> int:
+    index = get_url_index()
+    if index is None:
+        raise RuntimeError("URL_INDEX_DB is empty, so the URL index is disabled")
+    bucket = airtable_bucket()
+    params = {"pageSize": 100, "fields[]": "URL"}
+    imported = 0
+    while True:
+        await bucket.acquire()
+        response = await get_http_client("airtable").get(airtable_url(), headers=airtable_headers(), params=params)
+        if response.status_code == 429:
+            await asyncio.sleep(30)
+            continue
+        response.raise_for_status()
+        page = response.json()
+        rows = []
+        for record in page.get("records", []):
+            url = record.get("fields", {}).get("URL")
+            if not url:
+                continue
+            created = record.get("createdTime")
+            processed_at = datetime.fromisoformat(created.replace("Z", "+00:00")).timestamp() if created else time.time()
+            rows.append((canonicalize_url(url), record["id"], processed_at))
+        await asyncio.to_thread(index.import_records, rows)
+        imported += len(rows)
+        if not page.get("offset"):
+            return imported
+        params["offset"] = page["offset"]
+
+# Article downloads: on-disk HTTP cache honoring Cache-Control max-age and
+# revalidating with ETag / Last-Modified, so re-checks mostly become 304s.
+# A file's mtime is its last use; a periodic prune drops entries unused for
+# HTTP_CACHE_MAX_AGE, then the least recently used until it fits HTTP_CACHE_MAX_MB.
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", ".http_cache")  # empty disables the cache
+HTTP_CACHE_MAX_MB = float(os.getenv("HTTP_CACHE_MAX_MB", 500))  # 0 disables the size cap
+HTTP_CACHE_MAX_AGE = float(os.getenv("HTTP_CACHE_MAX_AGE", 7 * 86400))  # seconds; 0 disables the age cap
+HTTP_CACHE_PRUNE_INTERVAL = float(os.getenv("HTTP_CACHE_PRUNE_INTERVAL", 3600))
+
+class HTTPCache:
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def load(self, url: str):
+        path = self.path(url)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            os.utime(path)
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def store(self, url: str, entry: dict):
+        path = self.path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def prune(self, max_bytes: int, max_age: float) -> int:
+        now = time.time()
+        entries = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith(".tmp") and now - stat.st_mtime < 3600:
+                    continue  # may still be being written by store()
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            expired = max_age and now - mtime > max_age
+            if not expired and (not max_bytes or total <= max_bytes):
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+http_cache = HTTPCache(HTTP_CACHE_DIR) if HTTP_CACHE_DIR else None
+http_cache_pruner = None
+
+async def run_http_cache_pruner():
+    while True:
+        try:
+            await asyncio.to_thread(http_cache.prune, int(HTTP_CACHE_MAX_MB * 1024 * 1024), HTTP_CACHE_MAX_AGE)
+        except OSError as e:
+            print(f"HTTP cache prune error: {str(e)}")
+        await asyncio.sleep(HTTP_CACHE_PRUNE_INTERVAL)
+
+@app.on_event("startup")
+async def startup_http_cache():
+    global http_cache_pruner
+    if http_cache and (HTTP_CACHE_MAX_MB or HTTP_CACHE_MAX_AGE):
+        http_cache_pruner = asyncio.create_task(run_http_cache_pruner())
+
+@app.on_event("shutdown")
+async def shutdown_http_cache():
+    if http_cache_pruner is None:
+        return
+    http_cache_pruner.cancel()
+    try:
+        await http_cache_pruner
+    except asyncio.CancelledError:
+        pass
+
+def cache_policy(headers) -> tuple:
+    """Return (storable, seconds the response stays fresh) from Cache-Control."""
+    directives = {}
+    for part in headers.get("cache-control", "").lower().split(","):
+        name, _, value = part.strip().partition("=")
+        directives[name] = value.strip('"')
+    if "no-store" in directives:
+        return False, 0
+    if "no-cache" in directives:
+        return True, 0
+    try:
+        return True, int(directives.get("max-age", 0))
+    except ValueError:
+        return True, 0
+
+# Per-domain politeness: at most N concurrent requests per domain, request starts
+# spaced by a crawl delay, and a pause when a publisher answers 429/503
+DOWNLOAD_PER_DOMAIN_CONCURRENCY = int(os.getenv("DOWNLOAD_PER_DOMAIN_CONCURRENCY", 2))
+DOWNLOAD_CRAWL_DELAY = float(os.getenv("DOWNLOAD_CRAWL_DELAY", 0.5))
+DOWNLOAD_MAX_BYTES = int(os.getenv("DOWNLOAD_MAX_BYTES", 5 * 1024 * 1024))
+
+class DownloadTooLarge(Exception):
+    pass
+
+class DomainThrottle:
+    def __init__(self, concurrency: int, delay: float):
+        self.concurrency = concurrency
+        self.delay = delay
+        self.semaphores = {}
+        self.next_start = {}
+
+    @staticmethod
+    def domain(url: str) -> str:
+        host = urlsplit(url).hostname or ""
+        return host[len("www."):] if host.startswith("www.") else host
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        domain = self.domain(url)
+        semaphore = self.semaphores.setdefault(domain, asyncio.Semaphore(self.concurrency))
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            start = max(now, self.next_start.get(domain, 0))
+            self.next_start[domain] = start + self.delay
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+    def back_off(self, url: str, seconds: float):
+        domain = self.domain(url)
+        resume = asyncio.get_running_loop().time() + seconds
+        self.next_start[domain] = max(self.next_start.get(domain, 0), resume)
+
+domain_throttle = DomainThrottle(DOWNLOAD_PER_DOMAIN_CONCURRENCY, DOWNLOAD_CRAWL_DELAY)
+
+def retry_after_seconds(headers, default: float = 30) -> float:
+    try:
+        return float(headers.get("retry-after", default))
+    except ValueError:
+        return default  # HTTP-date form; not worth parsing
+
+async def download(url: str, headers: dict, max_bytes: int = DOWNLOAD_MAX_BYTES, decode: bool = True):
+    """GET a page under the domain throttle; returns (response, body text, or bytes, or None for 304)."""
+    async with domain_throttle.slot(url), download_slots:
+        async with get_http_client("articles").stream("GET", url, headers=headers) as response:
+            if response.status_code in (429, 503):
+                domain_throttle.back_off(url, retry_after_seconds(response.headers))
+            if response.status_code == 304:
+                return response, None
+            response.raise_for_status()
+            if int(response.headers.get("content-length") or 0) > max_bytes:
+                raise DownloadTooLarge(f"{url} is larger than {max_bytes} bytes")
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+                if len(body) > max_bytes:
+                    raise DownloadTooLarge(f"{url} is larger than {max_bytes} bytes")
+            if not decode:
+                return response, bytes(body)
+            return response, body.decode(response.charset_encoding or "utf-8", errors="replace")
+
+async def fetch_html(url: str) -> str:
+    cache_key = canonicalize_url(url)
+    cached = await asyncio.to_thread(http_cache.load, cache_key) if http_cache else None
+    if cached and cached["expires_at"] > time.time():
+        CACHE_REQUESTS.labels("http", "fresh").inc()
+        return cached["body"]
+
+    headers = {}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+    response, html = await download(url, headers)
+
+    if html is None and cached:
+        CACHE_REQUESTS.labels("http", "revalidated").inc()
+        _, max_age = cache_policy(response.headers)
+        cached.update(
+            expires_at=time.time() + max_age,
+            etag=response.headers.get("etag", cached.get("etag")),
+            last_modified=response.headers.get("last-modified", cached.get("last_modified")),
+        )
+        await asyncio.to_thread(http_cache.store, cache_key, cached)
+        return cached["body"]
+    if html is None:
+        raise httpx.HTTPStatusError("Unexpected 304 without a cached copy", request=response.request, response=response)
+
+    CACHE_REQUESTS.labels("http", "miss").inc()
+    storable, max_age = cache_policy(response.headers)
+    validators = response.headers.get("etag") or response.headers.get("last-modified")
+    if http_cache and storable and (max_age or validators):
+        await asyncio.to_thread(http_cache.store, cache_key, {
+            "body": html,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "expires_at": time.time() + max_age,
+        })
+    return html
+
+# Article parsing (runs in an executor; module-level so it can be pickled)
+def parse_html(url: str, html: str) -> dict:
+    from newspaper import Article
+
     article = Article(url)
-    article.download()
+    article.download(input_html=html)
     article.parse()
+    return {
+        "text": article.text,
+        "title": article.title,
+        "publish_date": article.publish_date,
+        "canonical_link": article.canonical_link,
+    }
 
-    if not article.text.strip():
-        return {"error": "No article text found."}
+# Article processor. Yields an "article" event once parsing finishes, the summary
+# events, and finally a "result" event holding the full response.
+NO_ARTICLE_TEXT = "No article text found."
 
-    text = article.text
-    title = article.title.strip()
-    date = article.publish_date.strftime("%Y-%m-%d") if article.publish_date else datetime.utcnow().strftime("%Y-%m-%d")
-    country, category = infer_country_category(text)
+async def article_events(url: str, stream: bool = False, force: bool = False):
+    cache_key = canonicalize_url(url)
+    index = get_url_index()
+    if not force:
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            yield {"event": "result", "result": cached}
+            return
+        seen = await asyncio.to_thread(index.get, cache_key) if index else None
+        if index:
+            CACHE_REQUESTS.labels("url_index", "hit" if seen else "miss").inc()
+        if seen:
+            yield {"event": "result", "result": {
+                "status": "already_processed",
+                "url": url,
+                "record_id": seen["record_id"],
+                "processed_at": datetime.utcfromtimestamp(seen["processed_at"]).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            }}
+            return
 
-    summary = await summarize_with_deepseek(text)
-    if not summary:
-        summary = summarize_with_bart(text)
+    with track_stage("download"):
+        html = await fetch_html(url)
+    with track_stage("parse"):
+        parsed = await run_in_executor("parse", parse_html, url, html)
+
+    if not parsed["text"].strip():
+        yield {"event": "result", "result": {"error": NO_ARTICLE_TEXT}}
+        return
+
+    text = parsed["text"]
+    title = parsed["title"].strip()
+    publish_date = parsed["publish_date"]
+    date = publish_date.strftime("%Y-%m-%d") if publish_date else datetime.utcnow().strftime("%Y-%m-%d")
+
+    # A near-duplicate of an article we already summarized reuses its summary and labels
+    signature = duplicate = None
+    if DEDUP_ENABLED:
+        with track_stage("dedup"):
+            signature = await run_in_executor("text", dedup_index.signature, text)
+            match = dedup_index.query(signature, exclude=cache_key)
+        if match:
+            duplicate = match[0]
+            DUPLICATES.inc()
+
+    if duplicate:
+        country, category = duplicate["country"], duplicate["category"]
+    else:
+        with track_stage("classify"):
+            country, category = await classify_article(text)
 
     result = {
         "url": url,
@@ -129,22 +2321,645 @@ async def process_article(url: str):
         "date": date,
         "country": country,
         "category": category,
-        "summary": summary
     }
+    if duplicate:
+        result["duplicate_of"] = duplicate["url"]
+    yield {"event": "article", "data": dict(result)}
 
-    airtable_response = await save_to_airtable(result)
-    status = airtable_response.status_code if airtable_response else "Airtable failed"
+    if duplicate:
+        event = {"event": "summary", "summary": duplicate["summary"]}
+        yield event
+    else:
+        async with summary_slots:
+            with track_stage("summarize"):
+                async for event in summarize_events(text, stream=stream):
+                    yield event
+        if signature is not None and event["summary"] != "Summary unavailable.":
+            dedup_index.insert(cache_key, signature, {
+                "url": url,
+                "country": country,
+                "category": category,
+                "summary": event["summary"],
+            })
+    result["summary"] = event["summary"]
 
-    return {
+    keys = [cache_key]
+    canonical_link = parsed["canonical_link"]
+    if canonical_link and same_site(url, canonical_link):
+        keys.append(canonicalize_url(canonical_link))
+
+    record_id = None  # filled in later by the write-behind queue
+    if duplicate and DEDUP_DUPLICATES == "skip":
+        status = "duplicate"
+        saved = True
+    elif AIRTABLE_WRITE_MODE == "queue":
+        # Indexed first so the writer's record id lands on an existing row; the writer
+        # removes the row again if Airtable rejects the record
+        if index:
+            await asyncio.to_thread(index.add, keys, content_hash(text))
+        airtable_writer.enqueue(result, keys)
+        status = "queued"
+        saved = True
+    else:
+        async with airtable_slots:
+            airtable_response = await save_to_airtable(result)
+        status = airtable_response.status_code if airtable_response else "Airtable failed"
+        saved = airtable_response is not None and airtable_response.is_success
+        if saved:
+            record_id = airtable_record_id(airtable_response.json())
+
+    response = {
         "status": "success",
         "data": result,
         "airtable_status": status
     }
+    if saved:
+        for key in keys:
+            result_cache.set(key, response)
+        if index and status != "queued":
+            await asyncio.to_thread(index.add, keys, content_hash(text), record_id)
+    yield {"event": "result", "result": response}
+
+# With an `events` queue the run streams summary deltas and forwards every event to it,
+# then None once it is over
+async def run_article(url: str, force: bool, events: asyncio.Queue = None):
+    try:
+        with track_stage("article"):
+            async for event in article_events(url, stream=events is not None, force=force):
+                if events is not None:
+                    events.put_nowait(event)
+                if event["event"] == "result":
+                    return event["result"]
+    finally:
+        if events is not None:
+            events.put_nowait(None)
+
+# Concurrent requests for the same article (by canonical URL) share one run of the pipeline
+articles_in_flight = {}
+
+def start_article(key: tuple, url: str, force: bool, events: asyncio.Queue = None) -> asyncio.Future:
+    task = articles_in_flight[key] = asyncio.ensure_future(run_article(url, force, events))
+    task.add_done_callback(lambda _: articles_in_flight.pop(key, None))
+    return task
+
+async def process_article(url: str, force: bool = False):
+    key = (canonicalize_url(url), force)
+    task = articles_in_flight.get(key)
+    if task is None:
+        task = start_article(key, url, force)
+    # Shielded: a caller that goes away must not cancel the run the others are waiting on
+    return await asyncio.shield(task)
+
+# Durable job queue: in queue mode the web process only records jobs and separate
+# worker processes (`python cli.py worker`) run them. Calls can wait on other processes'
+# write locks (busy_timeout), so callers run them in a thread, off the event loop.
+JOB_QUEUE_MODE = os.getenv("JOB_QUEUE_MODE", "0") == "1"
+JOBS_DB = os.getenv("JOBS_DB", "jobs.db")
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 600))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+
+class JobQueue:
+    def __init__(self, path: str, lease_seconds: float, max_attempts: int):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, url TEXT NOT NULL, status TEXT NOT NULL, result TEXT, error TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+            "available_at REAL NOT NULL, lease_until REAL, force INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+        if "force" not in columns:  # databases created before jobs carried `force`
+            self.conn.execute("ALTER TABLE jobs ADD COLUMN force INTEGER NOT NULL DEFAULT 0")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available_at)")
+
+    def enqueue_many(self, urls: List[str], force: bool = False) -> List[str]:
+        now = time.time()
+        job_ids = [uuid.uuid4().hex for _ in urls]
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO jobs (id, url, status, created_at, updated_at, available_at, force) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                [(job_id, url, now, now, now, int(force)) for job_id, url in zip(job_ids, urls)],
+            )
+        return job_ids
+
+    def enqueue(self, url: str, force: bool = False) -> str:
+        return self.enqueue_many([url], force)[0]
+
+    def claim(self):
+        # Take the oldest queued job, or one whose worker died holding the lease
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'Lease expired too many times', updated_at = ? "
+                    "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                    (now, now, self.max_attempts),
+                )
+                row = self.conn.execute(
+                    "SELECT id, url, force FROM jobs WHERE status = 'queued' AND available_at <= ? ORDER BY available_at LIMIT 1",
+                    (now,),
+                ).fetchone() or self.conn.execute(
+                    "SELECT id, url, force FROM jobs WHERE status = 'running' AND lease_until < ? ORDER BY created_at LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row:
+                    self.conn.execute(
+                        "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_until = ?, updated_at = ? WHERE id = ?",
+                        (now + self.lease_seconds, now, row[0]),
+                    )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return row
+
+    def complete(self, job_id: str, result: dict):
+        status = "failed" if "error" in result else "done"
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, lease_until = NULL, updated_at = ? WHERE id = ?",
+                (status, json.dumps(result), result.get("error"), time.time(), job_id),
+            )
+
+    def fail(self, job_id: str, error: str):
+        # Retry with exponential backoff until max_attempts is reached
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                "available_at = ? + (5 << attempts), error = ?, lease_until = NULL, updated_at = ? WHERE id = ?",
+                (self.max_attempts, now, error, now, job_id),
+            )
+
+    def get(self, job_id: str):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT id, url, status, result, error, attempts, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row[0],
+            "url": row[1],
+            "status": row[2],
+            "result": json.loads(row[3]) if row[3] else None,
+            "error": row[4],
+            "attempts": row[5],
+            "created_at": row[6],
+            "updated_at": row[7],
+        }
+
+    def stats(self) -> dict:
+        with self.lock:
+            return dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+job_queue = None
+
+def get_job_queue() -> JobQueue:
+    global job_queue
+    if job_queue is None:
+        job_queue = JobQueue(JOBS_DB, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS)
+    return job_queue
+
+# Worker loop: claim jobs and run them through process_article with bounded concurrency
+async def run_worker(concurrency: int, poll_interval: float, stop: asyncio.Event):
+    queue = await asyncio.to_thread(get_job_queue)
+    slots = asyncio.Semaphore(concurrency)
+    running = set()
+
+    async def run_job(job_id: str, url: str, force: int):
+        try:
+            result = await process_article(url, force=bool(force))
+            await asyncio.to_thread(queue.complete, job_id, result)
+        except Exception as e:
+            print(f"Job {job_id} failed for {url}: {str(e)}")
+            await asyncio.to_thread(queue.fail, job_id, str(e))
+        finally:
+            slots.release()
+
+    while not stop.is_set():
+        await slots.acquire()
+        job = await asyncio.to_thread(queue.claim)
+        if job is None:
+            slots.release()
+            try:
+                await asyncio.wait_for(stop.wait(), poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        task = asyncio.create_task(run_job(*job))
+        running.add(task)
+        task.add_done_callback(running.discard)
+
+    if running:
+        await asyncio.wait(running)
 
 # Main route
 @app.post("/process_url")
-async def handle_url(payload: ArticleInput):
-    return await process_article(str(payload.url))
+async def handle_url(payload: ArticleInput, stream: bool = False):
+    if JOB_QUEUE_MODE and not stream:
+        job_id = await asyncio.to_thread(get_job_queue().enqueue, str(payload.url), payload.force)
+        return {"job_id": job_id, "status": "queued"}
+    if not stream:
+        return await process_article(str(payload.url), force=payload.force)
+
+    async def events():
+        try:
+            key = (canonicalize_url(str(payload.url)), payload.force)
+            shared = articles_in_flight.get(key)
+            if shared is not None:
+                # Already being processed for another request: there are no deltas to stream
+                yield json.dumps({"event": "result", "result": await asyncio.shield(shared)}) + "\n"
+                return
+            # Registered like any other run, so requests arriving meanwhile wait for it; it
+            # also finishes for them if this client disconnects
+            queue = asyncio.Queue()
+            task = start_article(key, str(payload.url), payload.force, queue)
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield json.dumps(event) + "\n"
+            await asyncio.shield(task)  # raises if the run failed
+        except Exception as e:
+            print(f"Processing error for {payload.url}: {str(e)}")
+            yield json.dumps({"event": "result", "result": {"error": str(e)}}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await asyncio.to_thread(get_job_queue().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+# Readiness: the app serves immediately; the fallback model may still be loading
+@app.get("/ready")
+async def ready():
+    return {
+        "ready": True,
+        "fallback_loaded": fallback_summarizer is not None,
+        "summarizer_services": len(summarizer_client.live_connections()) if SUMMARIZER_MODE == "service" else None,
+    }
+
+# Prometheus metrics
+@app.get("/metrics")
+async def metrics():
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+# Cache statistics
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        "results": result_cache.stats(),
+        "summaries": summary_cache.memory.stats(),
+        "airtable_queue": airtable_writer.stats(),
+        "dedup": dedup_index.stats(),
+        "url_index": get_url_index().stats() if get_url_index() else None,
+    }
+
+# Batch route: fan URLs out concurrently and stream NDJSON results as they finish
+async def process_article_safe(url: str, force: bool = False):
+    try:
+        result = await process_article(url, force=force)
+    except Exception as e:
+        print(f"Processing error for {url}: {str(e)}")
+        result = {"error": str(e)}
+    return {"url": url, **result}
+
+@app.post("/process_urls")
+async def handle_urls(payload: BatchInput):
+    # One entry per canonical URL; the first spelling given is the one reported back
+    urls = {}
+    for url in payload.urls:
+        urls.setdefault(canonicalize_url(str(url)), str(url))
+    urls = list(urls.values())
+    if len(urls) > MAX_BATCH_URLS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_URLS} URLs per batch.")
+    if JOB_QUEUE_MODE:
+        job_ids = await asyncio.to_thread(get_job_queue().enqueue_many, urls, payload.force)
+        return {"jobs": [{"url": url, "job_id": job_id} for url, job_id in zip(urls, job_ids)]}
+
+    async def results():
+        tasks = [asyncio.ensure_future(process_article_safe(url, payload.force)) for url in urls]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+# Feed poller: polls RSS, Atom and sitemap sources listed in FEEDS_PATH (one URL per line),
+# revalidating each with its ETag / Last-Modified, and sends entries it has never seen to
+# the pipeline (the job queue in JOB_QUEUE_MODE, otherwise process_article directly).
+# An entry is only recorded as seen once it is queued or processed successfully, so one
+# that fails is picked up again on the next poll, up to FEED_MAX_ATTEMPTS times; failures
+# retrying can't fix (no article text, 4xx, oversized pages) count as seen straight away.
+# Feeds are claimed in SQLite, so several pollers can share one FEEDS_DB.
+FEEDS_PATH = os.getenv("FEEDS_PATH")  # unset disables the poller
+FEEDS_DB = os.getenv("FEEDS_DB", "feeds.db")
+FEED_POLLER_IN_APP = os.getenv("FEED_POLLER_IN_APP", "1") == "1"  # set to 0 when running `cli.py poll-feeds` instead
+FEED_POLL_INTERVAL = float(os.getenv("FEED_POLL_INTERVAL", 900))
+FEED_MAX_POLL_INTERVAL = float(os.getenv("FEED_MAX_POLL_INTERVAL", 4 * 3600))  # quiet feeds back off up to this
+FEED_POLL_CONCURRENCY = int(os.getenv("FEED_POLL_CONCURRENCY", 32))
+FEED_PROCESS_CONCURRENCY = int(os.getenv("FEED_PROCESS_CONCURRENCY", 8))
+FEED_SEEN_CAPACITY = int(os.getenv("FEED_SEEN_CAPACITY", 1000000))
+FEED_MAX_ATTEMPTS = int(os.getenv("FEED_MAX_ATTEMPTS", 3))
+FEED_MAX_CHILD_SITEMAPS = 5  # newest sitemaps followed from a sitemap index
+FEED_MAX_BYTES = int(os.getenv("FEED_MAX_BYTES", 50 * 1024 * 1024))  # the sitemap protocol allows 50 MB uncompressed
+
+FEED_ENTRIES = MetricCounter("news_feed_entries_total", "Feed entries found, by whether they were new", ["result"])
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+RSS1_NS = "{http://purl.org/rss/1.0/}"
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+def gunzip_feed(body: bytes) -> bytes:
+    # Stop at FEED_MAX_BYTES rather than inflating an arbitrarily large document
+    inflater = zlib.decompressobj(wbits=31)
+    data = inflater.decompress(body, FEED_MAX_BYTES + 1)
+    if len(data) > FEED_MAX_BYTES:
+        raise DownloadTooLarge(f"Feed is larger than {FEED_MAX_BYTES} bytes uncompressed")
+    return data
+
+def parse_feed(body) -> tuple:
+    """Return (entry links, child sitemap links) from an RSS, Atom or sitemap document (may be gzipped)."""
+    if isinstance(body, bytes) and body[:2] == b"\x1f\x8b":  # sitemap.xml.gz served without Content-Encoding
+        body = gunzip_feed(body)
+    root = ElementTree.fromstring(body)
+    tag = root.tag.rsplit("}", 1)[-1]
+    if tag == "sitemapindex":
+        sitemaps = [
+            (el.findtext(f"{SITEMAP_NS}lastmod") or el.findtext("lastmod") or "", el.findtext(f"{SITEMAP_NS}loc") or el.findtext("loc"))
+            for el in root.iter() if el.tag.rsplit("}", 1)[-1] == "sitemap"
+        ]
+        sitemaps.sort(reverse=True)
+        return [], [loc.strip() for _, loc in sitemaps[:FEED_MAX_CHILD_SITEMAPS] if loc]
+    if tag == "urlset":
+        links = [el.text for el in root.iter() if el.tag in (f"{SITEMAP_NS}loc", "loc") and el.text]
+    elif tag == "feed":
+        links = []
+        for entry in root.iter(f"{ATOM_NS}entry"):
+            for link in entry.iter(f"{ATOM_NS}link"):
+                if link.get("rel", "alternate") == "alternate" and link.get("href"):
+                    links.append(link.get("href"))
+                    break
+    else:  # RSS 2.0 (<rss><channel><item>) or RSS 1.0 (<rdf:RDF><item>)
+        links = [
+            item.findtext("link") or item.findtext(f"{RSS1_NS}link") or item.findtext("guid") or ""
+            for item in list(root.iter("item")) + list(root.iter(f"{RSS1_NS}item"))
+        ]
+    return [link.strip() for link in links if link.strip().startswith(("http://", "https://"))], []
+
+class FeedStore:
+    def __init__(self, path: str, seen_capacity: int):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS feeds ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, interval REAL NOT NULL, "
+            "next_poll_at REAL NOT NULL, last_polled_at REAL, failures INTEGER NOT NULL DEFAULT 0)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS seen (url TEXT PRIMARY KEY, seen_at REAL NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS failures (url TEXT PRIMARY KEY, attempts INTEGER NOT NULL)")
+        self.seen = BloomFilter(seen_capacity)
+        self.last_rowid = 0
+        self._refresh()
+
+    def _refresh(self):
+        # Picks up entries recorded by other pollers since the last call
+        with self.lock:
+            rows = self.conn.execute("SELECT rowid, url FROM seen WHERE rowid > ?", (self.last_rowid,)).fetchall()
+        for rowid, url in rows:
+            self.seen.add(url)
+            self.last_rowid = max(self.last_rowid, rowid)
+
+    def sync_feeds(self, urls: List[str]):
+        """Make the feeds table match the configured list; new feeds are due immediately."""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO feeds (url, interval, next_poll_at) VALUES (?, ?, 0)",
+                [(url, FEED_POLL_INTERVAL) for url in urls],
+            )
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS configured (url TEXT PRIMARY KEY)")
+            self.conn.execute("DELETE FROM configured")
+            self.conn.executemany("INSERT OR IGNORE INTO configured (url) VALUES (?)", [(url,) for url in urls])
+            self.conn.execute("DELETE FROM feeds WHERE url NOT IN (SELECT url FROM configured)")
+            self.conn.execute("COMMIT")
+
+    def claim_due(self, limit: int) -> list:
+        # Push next_poll_at forward while claiming so other pollers skip these feeds
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            rows = self.conn.execute(
+                "SELECT url, etag, last_modified, interval FROM feeds WHERE next_poll_at <= ? ORDER BY next_poll_at LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE feeds SET next_poll_at = ? WHERE url = ?", [(now + row[3], row[0]) for row in rows]
+            )
+            self.conn.execute("COMMIT")
+        return rows
+
+    def next_due_in(self) -> float:
+        with self.lock:
+            row = self.conn.execute("SELECT MIN(next_poll_at) FROM feeds").fetchone()
+        return max(0.0, row[0] - time.time()) if row[0] is not None else FEED_POLL_INTERVAL
+
+    def polled(self, url: str, etag: str, last_modified: str, interval: float, failed: bool = False):
+        now = time.time()
+        with self.lock:
+            if failed:
+                self.conn.execute(
+                    "UPDATE feeds SET failures = failures + 1, next_poll_at = ?, interval = ? WHERE url = ?",
+                    (now + interval, interval, url),
+                )
+            else:
+                self.conn.execute(
+                    "UPDATE feeds SET etag = ?, last_modified = ?, interval = ?, next_poll_at = ?, "
+                    "last_polled_at = ?, failures = 0 WHERE url = ?",
+                    (etag, last_modified, interval, now + interval, now, url),
+                )
+
+    def unseen(self, urls: List[str]) -> List[str]:
+        """Return the urls not recorded as seen (one per canonical URL)."""
+        self._refresh()
+        new = {}
+        with self.lock:
+            for url in urls:
+                key = canonicalize_url(url)
+                if key in new:
+                    continue
+                # A Bloom miss is a definite miss; only possible hits need the exact lookup
+                if key in self.seen and self.conn.execute("SELECT 1 FROM seen WHERE url = ?", (key,)).fetchone():
+                    continue
+                new[key] = url
+        return list(new.values())
+
+    def mark_seen(self, urls: List[str]):
+        now = time.time()
+        keys = [canonicalize_url(url) for url in urls]
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.executemany("INSERT OR IGNORE INTO seen (url, seen_at) VALUES (?, ?)", [(key, now) for key in keys])
+            self.conn.executemany("DELETE FROM failures WHERE url = ?", [(key,) for key in keys])
+            self.conn.execute("COMMIT")
+        for key in keys:
+            self.seen.add(key)
+
+    def record_failure(self, url: str) -> int:
+        """Count a failed attempt at url; returns the attempts so far."""
+        with self.lock:
+            return self.conn.execute(
+                "INSERT INTO failures (url, attempts) VALUES (?, 1) "
+                "ON CONFLICT(url) DO UPDATE SET attempts = attempts + 1 RETURNING attempts",
+                (canonicalize_url(url),),
+            ).fetchone()[0]
+
+def read_feed_list(path: str) -> List[str]:
+    with open(path) as f:
+        return list(dict.fromkeys(line.strip() for line in f if line.strip() and not line.startswith("#")))
+
+async def poll_feed(store: FeedStore, url: str, etag: str, last_modified: str, interval: float) -> List[str]:
+    """Fetch one feed (following a sitemap index one level down); returns links not seen before."""
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    try:
+        with track_stage("feed"):
+            # Raw bytes: the XML declaration names the encoding, and .xml.gz sitemaps are gunzipped in parse_feed
+            response, body = await download(url, headers, FEED_MAX_BYTES, decode=False)
+            if body is None:
+                await asyncio.to_thread(store.polled, url, etag, last_modified, min(interval * 2, FEED_MAX_POLL_INTERVAL))
+                return []
+            links, sitemaps = await run_in_executor("parse", parse_feed, body)
+            for sitemap in sitemaps:
+                _, child_body = await download(sitemap, {}, FEED_MAX_BYTES, decode=False)
+                links.extend((await run_in_executor("parse", parse_feed, child_body))[0])
+    except Exception as e:
+        print(f"Feed error for {url}: {str(e)}")
+        await asyncio.to_thread(store.polled, url, etag, last_modified, min(interval * 2, FEED_MAX_POLL_INTERVAL), True)
+        return []
+
+    new = await asyncio.to_thread(store.unseen, links)
+    FEED_ENTRIES.labels("new").inc(len(new))
+    FEED_ENTRIES.labels("seen").inc(len(links) - len(new))
+    # Feeds with new entries are polled at the base interval; quiet ones back off
+    interval = FEED_POLL_INTERVAL if new else min(interval * 2, FEED_MAX_POLL_INTERVAL)
+    await asyncio.to_thread(
+        store.polled, url, response.headers.get("etag"), response.headers.get("last-modified"), interval
+    )
+    return new
+
+def permanent_failure(error: Exception) -> bool:
+    if isinstance(error, DownloadTooLarge):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return 400 <= status < 500 and status not in (408, 429)
+    return False
+
+async def run_feed_poller(stop: asyncio.Event):
+    store = await asyncio.to_thread(FeedStore, FEEDS_DB, FEED_SEEN_CAPACITY)
+    await asyncio.to_thread(store.sync_feeds, read_feed_list(FEEDS_PATH))
+    process_slots = asyncio.Semaphore(FEED_PROCESS_CONCURRENCY)
+    processing = set()
+    pending = set()  # canonical URLs being processed, so the next poll doesn't start them again
+
+    async def process(url: str, key: str):
+        try:
+            try:
+                async with process_slots:
+                    result = await process_article(url)
+                error = result.get("error")
+                permanent = error == NO_ARTICLE_TEXT  # e.g. video or gallery pages
+            except Exception as e:
+                print(f"Processing error for {url}: {str(e)}")
+                error = str(e)
+                permanent = permanent_failure(e)
+            if error and not permanent and await asyncio.to_thread(store.record_failure, url) < FEED_MAX_ATTEMPTS:
+                return
+            await asyncio.to_thread(store.mark_seen, [url])
+        finally:
+            pending.discard(key)
+
+    try:
+        while not stop.is_set():
+            feeds = await asyncio.to_thread(store.claim_due, FEED_POLL_CONCURRENCY)
+            if feeds:
+                for new in await asyncio.gather(*(poll_feed(store, *feed) for feed in feeds)):
+                    if not new:
+                        continue
+                    if JOB_QUEUE_MODE:
+                        # Queued jobs are durable and retried, so they count as seen once enqueued
+                        await asyncio.to_thread(get_job_queue().enqueue_many, new)
+                        await asyncio.to_thread(store.mark_seen, new)
+                        continue
+                    for url in new:
+                        key = canonicalize_url(url)
+                        if key in pending:
+                            continue
+                        pending.add(key)
+                        task = asyncio.create_task(process(url, key))
+                        processing.add(task)
+                        task.add_done_callback(processing.discard)
+                continue
+            try:
+                await asyncio.wait_for(stop.wait(), min(60, await asyncio.to_thread(store.next_due_in)))
+            except asyncio.TimeoutError:
+                pass
+    except asyncio.CancelledError:
+        # Articles cut short are not marked seen, so they are picked up again after a restart
+        for task in processing:
+            task.cancel()
+        raise
+
+    if processing:
+        await asyncio.wait(processing)
+
+feed_poller_task = None
+
+@app.on_event("startup")
+async def startup_feed_poller():
+    global feed_poller_task
+    if FEEDS_PATH and FEED_POLLER_IN_APP:
+        feed_poller_task = asyncio.create_task(run_feed_poller(asyncio.Event()))
+
+async def shutdown_feed_poller():
+    if feed_poller_task is not None:
+        feed_poller_task.cancel()
+        try:
+            await feed_poller_task
+        except asyncio.CancelledError:
+            pass
+
+# Shutdown hooks run in registration order. The feed poller stops first, so no new articles
+# start; the section hooks above then stop the batchers, dedup saver and Airtable writer;
+# executors and HTTP clients are closed last, once nothing can use them.
+app.router.on_shutdown.insert(0, shutdown_feed_poller)
+app.router.add_event_handler("shutdown", shutdown_executors)
+app.router.add_event_handler("shutdown", shutdown_http_clients)
 
 # Local dev run
 if __name__ == "__main__":
@@ -0,0 +1,12 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# main reads its configuration at import time: keep the tests away from the
+# working directory's index, snapshot and cache files
+os.environ.setdefault("URL_INDEX_DB", "")
+os.environ.setdefault("DEDUP_SNAPSHOT_PATH", "")
+os.environ.setdefault("HTTP_CACHE_DIR", "")
+os.environ.setdefault("AIRTABLE_SPOOL_PATH", "")
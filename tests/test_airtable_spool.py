@@ -0,0 +1,169 @@
+import os
+import json
+import asyncio
+import subprocess
+import sys
+
+import httpx
+import pytest
+
+import main
+
+
+def write_spool(path, entries):
+    with open(path, "w") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
+
+def record(url):
+    return {"id": url.rsplit("/", 1)[-1], "fields": {"URL": url}}
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+@pytest.fixture
+def airtable(monkeypatch):
+    """Fake Airtable API; returns the list of URLs it received."""
+    received = []
+
+    def handler(request):
+        records = json.loads(request.content)["records"]
+        received.extend(entry["fields"]["URL"] for entry in records)
+        return httpx.Response(200, json={"records": [{"id": f"rec{len(received)}"} for _ in records]})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setitem(main.http_clients, "airtable", client)
+    monkeypatch.setattr(main, "AIRTABLE_FLUSH_INTERVAL", 0.01)
+    return received
+
+
+async def drain(writer):
+    for _ in range(200):
+        if not writer.pending:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"records still pending: {list(writer.pending)}")
+
+
+def test_replays_own_spool_and_adopts_orphans(tmp_path, airtable):
+    base = str(tmp_path / "spool.jsonl")
+    write_spool(f"{base}.{os.getpid()}", [
+        record("https://example.com/a"),
+        record("https://example.com/b"),
+        {"id": "b", "done": True},
+    ])
+    orphan = dead_pid()
+    write_spool(f"{base}.{orphan}", [record("https://example.com/c")])
+    write_spool(f"{base}.{orphan}.adopting", [record("https://example.com/d")])
+    write_spool(base, [record("https://example.com/e")])  # single-process spool
+    live = f"{base}.{os.getppid()}"
+    write_spool(live, [record("https://example.com/f")])
+
+    async def run():
+        writer = main.AirtableWriter(base, main.TokenBucket(100), 0)
+        writer.start()
+        await drain(writer)
+        await writer.stop()
+
+    asyncio.run(run())
+    assert sorted(airtable) == [f"https://example.com/{name}" for name in "acde"]
+    # Orphans are gone, the live process keeps its spool, and an empty spool is removed
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(live)]
+
+
+def test_pending_records_survive_a_restart(tmp_path, airtable, monkeypatch):
+    base = str(tmp_path / "spool.jsonl")
+    article = {"url": "https://example.com/a", "title": "A", "date": "2024-01-01",
+               "country": "UK", "category": "Politics", "summary": "S"}
+
+    async def run():
+        writer = main.AirtableWriter(base, main.TokenBucket(100), 0)
+        monkeypatch.setattr(writer, "_run", lambda: asyncio.sleep(3600))  # Airtable unreachable
+        writer.enqueue(article)
+        await writer.stop()
+        assert airtable == []
+        # Records arriving after shutdown go to the spool rather than restarting the writer
+        writer.enqueue({**article, "url": "https://example.com/b"})
+        assert writer.worker is None
+
+        restarted = main.AirtableWriter(base, main.TokenBucket(100), 0)
+        restarted.start()
+        await drain(restarted)
+        await restarted.stop()
+
+    asyncio.run(run())
+    assert airtable == ["https://example.com/a", "https://example.com/b"]
+    assert os.listdir(tmp_path) == []
+
+
+def test_rejected_records_are_moved_aside(tmp_path, monkeypatch):
+    base = str(tmp_path / "spool.jsonl")
+    write_spool(base, [record("https://example.com/a")])
+
+    def handler(request):
+        return httpx.Response(422, json={"error": "INVALID_VALUE_FOR_COLUMN"})
+
+    monkeypatch.setitem(main.http_clients, "airtable", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(main, "AIRTABLE_FLUSH_INTERVAL", 0.01)
+
+    async def run():
+        writer = main.AirtableWriter(base, main.TokenBucket(100), 0)
+        writer.start()
+        await drain(writer)
+        await writer.stop()
+
+    asyncio.run(run())
+    with open(f"{base}.failed") as f:
+        assert [json.loads(line)["fields"]["URL"] for line in f] == ["https://example.com/a"]
+
+
+@pytest.fixture
+def url_index(tmp_path, monkeypatch):
+    index = main.URLIndex(str(tmp_path / "urls.db"), 1000)
+    monkeypatch.setattr(main, "url_index", index)
+    return index
+
+
+def test_record_ids_reach_every_index_key(tmp_path, airtable, url_index):
+    base = str(tmp_path / "spool.jsonl")
+    keys = ["https://example.com/a", "https://example.com/canonical-a"]
+    url_index.add(keys, "hash")
+    article = {"url": "https://example.com/a?utm_source=x", "title": "A", "date": "2024-01-01",
+               "country": "UK", "category": "Politics", "summary": "S"}
+
+    async def run():
+        writer = main.AirtableWriter(base, main.TokenBucket(100), 0)
+        writer.enqueue(article, keys)
+        await drain(writer)
+        await writer.stop()
+
+    asyncio.run(run())
+    assert [url_index.get(key)["record_id"] for key in keys] == ["rec1", "rec1"]
+
+
+def test_rejected_records_leave_the_index(tmp_path, monkeypatch, url_index):
+    base = str(tmp_path / "spool.jsonl")
+    write_spool(base, [{**record("https://example.com/a"), "keys": ["https://example.com/a", "https://example.com/b"]}])
+    url_index.add(["https://example.com/a", "https://example.com/b", "https://example.com/c"], "hash")
+
+    def handler(request):
+        return httpx.Response(422, json={"error": "INVALID_VALUE_FOR_COLUMN"})
+
+    monkeypatch.setitem(main.http_clients, "airtable", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(main, "AIRTABLE_FLUSH_INTERVAL", 0.01)
+
+    async def run():
+        writer = main.AirtableWriter(base, main.TokenBucket(100), 0)
+        writer.start()
+        await drain(writer)
+        await writer.stop()
+
+    asyncio.run(run())
+    assert url_index.get("https://example.com/a") is None
+    assert url_index.get("https://example.com/b") is None
+    assert url_index.get("https://example.com/c") is not None
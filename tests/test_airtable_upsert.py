@@ -0,0 +1,21 @@
+import asyncio
+
+import main
+
+
+def test_upsert_payload_uses_indexed_record_ids(tmp_path, monkeypatch):
+    index = main.URLIndex(str(tmp_path / "urls.db"), 1000)
+    index.add(["https://example.com/a"], "hash", "recA")
+    index.add(["https://example.com/b"], "hash")  # queued, no record id yet
+    monkeypatch.setattr(main, "url_index", index)
+    records = [{"URL": f"https://example.com/{name}"} for name in "abc"]
+
+    payload = asyncio.run(main.airtable_upsert_payload(records))
+    assert payload["performUpsert"] == {"fieldsToMergeOn": ["URL"]}
+    assert payload["records"] == [
+        {"id": "recA", "fields": records[0]},
+        {"fields": records[1]},
+        {"fields": records[2]},
+    ]
+    merged_on_url = asyncio.run(main.airtable_upsert_payload(records, use_known_ids=False))
+    assert all("id" not in entry for entry in merged_on_url["records"])
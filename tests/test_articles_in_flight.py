@@ -0,0 +1,55 @@
+import asyncio
+import json
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Fake article pipeline; returns the list of URLs it ran for."""
+    runs = []
+
+    async def article_events(url, stream=False, force=False):
+        runs.append(url)
+        await asyncio.sleep(0.05)
+        if "broken" in url:
+            raise RuntimeError("parse failed")
+        if stream:
+            yield {"event": "delta", "text": "Sum"}
+        yield {"event": "result", "result": {"status": "success", "url": url}}
+
+    monkeypatch.setattr(main, "article_events", article_events)
+    return runs
+
+
+async def stream_lines(url):
+    response = await main.handle_url(main.ArticleInput(url=url), stream=True)
+    return [json.loads(line) async for line in response.body_iterator]
+
+
+def test_streaming_run_is_shared(pipeline):
+    async def run():
+        streamed = asyncio.ensure_future(stream_lines("https://example.com/a"))
+        await asyncio.sleep(0.01)
+        shared = await main.process_article("https://example.com/a?utm_source=x")
+        return await streamed, shared
+
+    lines, shared = asyncio.run(run())
+    assert pipeline == ["https://example.com/a"]
+    assert [line["event"] for line in lines] == ["delta", "result"]
+    assert shared == lines[-1]["result"]
+    assert main.articles_in_flight == {}
+
+
+def test_failed_streaming_run_reports_the_error(pipeline):
+    async def run():
+        streamed = asyncio.ensure_future(stream_lines("https://example.com/broken"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(RuntimeError):
+            await main.process_article("https://example.com/broken")
+        return await streamed
+
+    assert asyncio.run(run()) == [{"event": "result", "result": {"error": "parse failed"}}]
+    assert main.articles_in_flight == {}
@@ -0,0 +1,43 @@
+import pytest
+
+import main
+
+
+@pytest.mark.parametrize("url, expected", [
+    # tracking parameters dropped, the rest sorted
+    ("https://example.com/a?utm_source=x&b=2&a=1&fbclid=y", "https://example.com/a?a=1&b=2"),
+    ("https://example.com/a?UTM_Campaign=x", "https://example.com/a"),
+    # scheme and host case, default ports, trailing dots, fragments
+    ("HTTPS://Example.COM:443/a#comments", "https://example.com/a"),
+    ("http://example.com.:80/a", "http://example.com/a"),
+    ("http://example.com:8080/a", "http://example.com:8080/a"),
+    # IPv6 literals keep their brackets
+    ("http://[::1]:8080/a", "http://[::1]:8080/a"),
+    ("https://[2001:DB8::1]:443/a", "https://[2001:db8::1]/a"),
+    # trailing and duplicate slashes
+    ("https://example.com/a/b/", "https://example.com/a/b"),
+    ("https://example.com//a///b", "https://example.com/a/b"),
+    ("https://example.com", "https://example.com/"),
+    # AMP variants
+    ("https://amp.example.com/story", "https://example.com/story"),
+    ("https://example.com/story/amp", "https://example.com/story"),
+    ("https://example.com/amp/story", "https://example.com/story"),
+    ("https://example.com/story.amp.html", "https://example.com/story.html"),
+    ("https://example.com/story?amp=1", "https://example.com/story"),
+])
+def test_canonicalize_url(url, expected):
+    assert main.canonicalize_url(url) == expected
+
+
+def test_www_is_kept():
+    # www.example.com and example.com can serve different content
+    assert main.canonicalize_url("https://www.example.com/a") == "https://www.example.com/a"
+
+
+def test_blank_query_values_are_kept():
+    assert main.canonicalize_url("https://example.com/a?id=&page=2") == "https://example.com/a?id=&page=2"
+
+
+def test_idempotent():
+    url = main.canonicalize_url("https://amp.Example.com/a/amp/?utm_medium=x&z=1&a=2")
+    assert main.canonicalize_url(url) == url
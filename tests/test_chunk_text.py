@@ -0,0 +1,63 @@
+import pytest
+
+import main
+
+
+def test_short_ascii_text_is_one_chunk():
+    assert main.chunk_text("One sentence. Another one.", 100) == ["One sentence. Another one."]
+
+
+@pytest.mark.parametrize("estimate", [False, True])
+def test_blank_text_has_no_chunks(estimate):
+    assert main.chunk_text("  \n ", 100, estimate=estimate) == []
+
+
+def test_estimate_tokens():
+    assert main.estimate_tokens("") == 0
+    assert main.estimate_tokens("abcdef") == 2
+    assert main.estimate_tokens("abcdefg") == 3
+    # Non-ASCII characters count a token each
+    assert main.estimate_tokens("日本語") == 3
+    assert main.estimate_tokens("café") == 2
+
+
+def test_estimated_chunks_split_on_sentences():
+    sentences = [f"Sentence number {i} has a few words in it." for i in range(200)]
+    text = " ".join(sentences)
+    chunks = main.chunk_text(text, 100, estimate=True)
+    assert len(chunks) > 1
+    assert all(main.estimate_tokens(chunk) <= 100 for chunk in chunks)
+    # Nothing lost or reordered, and no sentence cut in half
+    assert " ".join(chunks) == text
+    assert all(chunk.endswith(".") for chunk in chunks)
+
+
+def test_estimated_chunks_split_overlong_sentences():
+    text = "字" * 1000  # no sentence boundary at all
+    chunks = main.chunk_text(text, 300, estimate=True)
+    assert "".join(chunks) == text
+    assert all(main.estimate_tokens(chunk) <= 300 for chunk in chunks)
+
+
+def test_non_ascii_text_does_not_take_the_character_shortcut(monkeypatch):
+    # Fewer characters than max_tokens, but BART may need several tokens per character
+    class Tokenizer:
+        def __call__(self, texts, add_special_tokens=False):
+            if isinstance(texts, str):
+                return {"input_ids": [0] * (3 * len(texts))}
+            return {"input_ids": [[0] * (3 * len(text)) for text in texts]}
+
+        def decode(self, ids):
+            return "字" * (len(ids) // 3)
+
+    monkeypatch.setattr(main, "get_tokenizer", Tokenizer)
+    chunks = main.chunk_text("字" * 50, 60)
+    assert chunks == ["字" * 20, "字" * 20, "字" * 10]
+
+
+def test_short_ascii_text_skips_the_tokenizer(monkeypatch):
+    def fail():
+        raise AssertionError("tokenizer loaded")
+
+    monkeypatch.setattr(main, "get_tokenizer", fail)
+    assert main.chunk_text("Short text.", 50) == ["Short text."]
@@ -0,0 +1,116 @@
+import time
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+
+def breaker(**options):
+    settings = dict(window=60, min_calls=4, error_rate=0.5, slow_seconds=10, slow_rate=0.5, open_seconds=30, probes=2)
+    settings.update(options)
+    return main.CircuitBreaker("test", **settings)
+
+
+def call(circuit, success=True, seconds=1.0):
+    assert circuit.allow()
+    circuit.finish(success, seconds)
+
+
+def test_stays_closed_below_min_calls(clock):
+    circuit = breaker()
+    for _ in range(3):
+        call(circuit, success=False)
+    assert circuit.state == circuit.CLOSED
+
+
+def test_opens_on_error_rate(clock):
+    circuit = breaker()
+    call(circuit)
+    call(circuit)
+    call(circuit, success=False)
+    assert circuit.state == circuit.CLOSED
+    call(circuit, success=False)
+    assert circuit.state == circuit.OPEN
+    assert not circuit.allow()
+    assert not circuit.available()
+
+
+def test_opens_on_slow_rate(clock):
+    circuit = breaker()
+    call(circuit)
+    call(circuit)
+    call(circuit, seconds=12)
+    call(circuit, seconds=15)
+    assert circuit.state == circuit.OPEN
+
+
+def test_old_calls_leave_the_window(clock):
+    circuit = breaker()
+    call(circuit, success=False)
+    call(circuit, success=False)
+    clock[0] += 61
+    call(circuit)
+    call(circuit)
+    call(circuit)
+    call(circuit, success=False)
+    assert circuit.state == circuit.CLOSED
+
+
+def test_half_open_after_cooldown_then_closes(clock):
+    circuit = breaker()
+    for _ in range(4):
+        call(circuit, success=False)
+    clock[0] += 29
+    assert not circuit.allow()
+    clock[0] += 1
+    assert circuit.available()
+    assert circuit.allow()
+    assert circuit.state == circuit.HALF_OPEN
+    assert circuit.allow()
+    # Only `probes` calls at a time while half-open
+    assert not circuit.allow()
+    assert not circuit.available()
+    circuit.finish(True, 1.0)
+    assert circuit.state == circuit.HALF_OPEN
+    circuit.finish(True, 1.0)
+    assert circuit.state == circuit.CLOSED
+
+
+@pytest.mark.parametrize("success, seconds", [(False, 1.0), (True, 11.0)])
+def test_failed_or_slow_probe_reopens(clock, success, seconds):
+    circuit = breaker()
+    for _ in range(4):
+        call(circuit, success=False)
+    clock[0] += 30
+    assert circuit.allow()
+    circuit.finish(success, seconds)
+    assert circuit.state == circuit.OPEN
+    assert not circuit.allow()
+
+
+def test_cancelled_probe_frees_its_slot(clock):
+    circuit = breaker(probes=1)
+    for _ in range(4):
+        call(circuit, success=False)
+    clock[0] += 30
+    assert circuit.allow()
+    assert not circuit.allow()
+    circuit.finish(None, 0.5)
+    assert circuit.state == circuit.HALF_OPEN
+    assert circuit.allow()
+
+
+def test_calls_started_before_opening_are_ignored(clock):
+    circuit = breaker()
+    assert circuit.allow()  # still running when the circuit opens
+    for _ in range(4):
+        call(circuit, success=False)
+    circuit.finish(True, 1.0)
+    assert circuit.state == circuit.OPEN
@@ -0,0 +1,56 @@
+import asyncio
+
+import main
+
+
+def long_article(sentences):
+    return " ".join(f"Sentence {i} of a very long article." for i in range(sentences))
+
+
+def run(monkeypatch, text, fail=False, max_chunks=3, concurrency=2):
+    monkeypatch.setattr(main, "DEEPSEEK_MAX_PROMPT_TOKENS", 100)
+    monkeypatch.setattr(main, "DEEPSEEK_MAX_CHUNKS", max_chunks)
+    monkeypatch.setattr(main, "SUMMARY_MAP_REDUCE", True)
+    calls, active = [], [0, 0]
+
+    async def summarize_with_deepseek(chunk):
+        calls.append(chunk)
+        active[0] += 1
+        active[1] = max(active[1], active[0])
+        await asyncio.sleep(0.01)
+        active[0] -= 1
+        return None if fail else "Short summary."
+
+    monkeypatch.setattr(main, "summarize_with_deepseek", summarize_with_deepseek)
+
+    async def go():
+        monkeypatch.setattr(main, "deepseek_map_slots", asyncio.Semaphore(concurrency))
+        return await main.deepseek_input(text)
+
+    return asyncio.run(go()), calls, active[1]
+
+
+def test_short_text_is_sent_as_is(monkeypatch):
+    result, calls, _ = run(monkeypatch, "A short article.")
+    assert result == "A short article."
+    assert calls == []
+
+
+def test_map_step_is_bounded(monkeypatch):
+    result, calls, most_in_flight = run(monkeypatch, long_article(200))
+    assert len(calls) == 3  # DEEPSEEK_MAX_CHUNKS
+    assert most_in_flight == 2  # DEEPSEEK_MAP_CONCURRENCY
+    assert result == "\n\n".join(["Short summary."] * 3)
+
+
+def test_failure_skips_the_remaining_chunks(monkeypatch):
+    result, calls, _ = run(monkeypatch, long_article(200), fail=True, max_chunks=8, concurrency=1)
+    assert result is None
+    assert len(calls) == 1
+
+
+def test_reduce_step_does_not_recurse(monkeypatch):
+    monkeypatch.setattr(main, "estimate_tokens", lambda text: len(text))  # summaries that still don't fit
+    result, calls, _ = run(monkeypatch, long_article(200), max_chunks=20)
+    assert len(calls) == 20
+    assert main.estimate_tokens(result) <= 100
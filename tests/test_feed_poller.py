@@ -0,0 +1,62 @@
+import asyncio
+
+import httpx
+
+import main
+
+RSS = b"""<rss><channel>
+<item><link>https://news.example/ok</link></item>
+<item><link>https://news.example/flaky</link></item>
+<item><link>https://news.example/video</link></item>
+<item><link>https://news.example/gone</link></item>
+<item><link>https://news.example/down</link></item>
+</channel></rss>"""
+
+
+def test_failed_entries_are_retried_until_they_succeed_or_run_out(tmp_path, monkeypatch):
+    feeds = tmp_path / "feeds.txt"
+    feeds.write_text("https://feed.example/rss\n")
+    monkeypatch.setattr(main, "FEEDS_PATH", str(feeds))
+    monkeypatch.setattr(main, "FEEDS_DB", str(tmp_path / "feeds.db"))
+    monkeypatch.setattr(main, "FEED_POLL_INTERVAL", 0.05)
+    monkeypatch.setattr(main, "FEED_MAX_POLL_INTERVAL", 0.05)
+    monkeypatch.setattr(main, "FEED_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(main, "JOB_QUEUE_MODE", False)
+
+    class Response:
+        headers = {}
+
+    async def download(url, headers, max_bytes=0, decode=True):
+        return Response(), RSS
+
+    calls = []
+
+    async def process_article(url, force=False):
+        calls.append(url)
+        name = url.rsplit("/", 1)[-1]
+        if name == "flaky" and calls.count(url) < 2:
+            raise httpx.ConnectError("connection reset")
+        if name == "video":
+            return {"error": main.NO_ARTICLE_TEXT}
+        if name == "gone":
+            request = httpx.Request("GET", url)
+            raise httpx.HTTPStatusError("404", request=request, response=httpx.Response(404, request=request))
+        if name == "down":
+            raise httpx.ConnectError("connection refused")
+        return {"status": "success"}
+
+    monkeypatch.setattr(main, "download", download)
+    monkeypatch.setattr(main, "process_article", process_article)
+
+    async def run():
+        stop = asyncio.Event()
+        poller = asyncio.create_task(main.run_feed_poller(stop))
+        await asyncio.sleep(1)
+        stop.set()
+        await poller
+
+    asyncio.run(run())
+    counts = {name: calls.count(f"https://news.example/{name}") for name in ("ok", "flaky", "video", "gone", "down")}
+    assert counts == {"ok": 1, "flaky": 2, "video": 1, "gone": 1, "down": 3}
+    store = main.FeedStore(str(tmp_path / "feeds.db"), 100)
+    assert store.unseen([f"https://news.example/{name}" for name in counts]) == []
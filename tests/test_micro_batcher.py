@@ -0,0 +1,56 @@
+import asyncio
+import threading
+
+import pytest
+
+import main
+
+
+class Blocking:
+    """Batch function that holds each batch until released; records the most running at once."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        self.running = self.most_running = 0
+
+    def __call__(self, items):
+        with self.lock:
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+        self.release.wait(5)
+        with self.lock:
+            self.running -= 1
+        return [item * 2 for item in items]
+
+
+@pytest.mark.parametrize("max_in_flight", [1, 2])
+def test_batches_in_flight(max_in_flight):
+    batch_fn = Blocking()
+
+    async def run():
+        batcher = main.MicroBatcher(batch_fn, 1, 0, executor="text", max_in_flight=max_in_flight)
+        calls = asyncio.gather(*(batcher.submit(i) for i in range(3)))
+        await asyncio.sleep(0.1)
+        batch_fn.release.set()
+        results = await calls
+        await batcher.stop()
+        return results
+
+    assert asyncio.run(run()) == [0, 2, 4]
+    assert batch_fn.most_running == max_in_flight
+
+
+def test_stop_fails_running_batches():
+    batch_fn = Blocking()
+
+    async def run():
+        batcher = main.MicroBatcher(batch_fn, 1, 0, executor="text", max_in_flight=2)
+        calls = asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+        await asyncio.sleep(0.1)
+        await batcher.stop()
+        batch_fn.release.set()
+        return await calls
+
+    results = asyncio.run(run())
+    assert [str(result) for result in results] == ["Batcher stopped"] * 3
@@ -0,0 +1,73 @@
+import gzip
+
+import pytest
+
+import main
+
+RSS = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel>
+  <title>News</title>
+  <item><title>One</title><link>https://example.com/one</link></item>
+  <item><title>Two</title><guid>https://example.com/two</guid></item>
+  <item><title>Relative</title><link>/three</link></item>
+</channel></rss>"""
+
+RSS1 = """<?xml version="1.0"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="http://purl.org/rss/1.0/">
+  <item rdf:about="https://example.com/one"><link>https://example.com/one</link></item>
+</rdf:RDF>"""
+
+ATOM = """<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <entry>
+    <link rel="self" href="https://example.com/feed/one"/>
+    <link href="https://example.com/one"/>
+  </entry>
+  <entry><link rel="alternate" href=" https://example.com/two "/></entry>
+</feed>"""
+
+URLSET = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://example.com/one</loc><lastmod>2024-01-01</lastmod></url>
+  <url><loc>https://example.com/two</loc></url>
+</urlset>"""
+
+
+def sitemap_index(count):
+    sitemaps = "".join(
+        f"<sitemap><loc>https://example.com/sitemap-{i:02d}.xml</loc><lastmod>2024-01-{i:02d}</lastmod></sitemap>"
+        for i in range(1, count + 1)
+    )
+    return f'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{sitemaps}</sitemapindex>'
+
+
+@pytest.mark.parametrize("body, links", [
+    (RSS, ["https://example.com/one", "https://example.com/two"]),
+    (RSS1, ["https://example.com/one"]),
+    (ATOM, ["https://example.com/one", "https://example.com/two"]),
+    (URLSET, ["https://example.com/one", "https://example.com/two"]),
+])
+def test_entry_links(body, links):
+    assert main.parse_feed(body) == (links, [])
+
+
+def test_bytes_and_gzip():
+    assert main.parse_feed(URLSET.encode()) == main.parse_feed(URLSET)
+    assert main.parse_feed(gzip.compress(URLSET.encode())) == main.parse_feed(URLSET)
+
+
+def test_gzip_bomb_is_rejected(monkeypatch):
+    monkeypatch.setattr(main, "FEED_MAX_BYTES", 1000)
+    with pytest.raises(main.DownloadTooLarge):
+        main.parse_feed(gzip.compress(URLSET.encode() + b" " * 2000))
+
+
+def test_sitemap_index_follows_newest_sitemaps():
+    links, sitemaps = main.parse_feed(sitemap_index(8))
+    assert links == []
+    assert sitemaps == [f"https://example.com/sitemap-{i:02d}.xml" for i in range(8, 8 - main.FEED_MAX_CHILD_SITEMAPS, -1)]
+
+
+def test_invalid_xml_raises():
+    with pytest.raises(Exception):
+        main.parse_feed("<html><body>not a feed")
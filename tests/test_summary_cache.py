@@ -0,0 +1,30 @@
+import asyncio
+import time
+
+import main
+
+
+def test_disk_tier_survives_a_new_memory_tier(tmp_path):
+    path = str(tmp_path / "summaries.db")
+
+    async def run():
+        await main.SummaryCache(10, path).set("k", "summary")
+        return await main.SummaryCache(10, path).get("k")
+
+    assert asyncio.run(run()) == "summary"
+
+
+def test_disk_tier_is_capped_by_rows_and_age(tmp_path, monkeypatch):
+    cache = main.SQLiteCache(str(tmp_path / "summaries.db"), max_rows=3, max_age=3600)
+    monkeypatch.setattr(cache, "PRUNE_EVERY", 1)
+    now = [1000000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    for i in range(5):
+        cache.set(f"k{i}", f"v{i}")
+        now[0] += 1
+    assert [cache.get(f"k{i}") for i in range(5)] == [None, None, "v2", "v3", "v4"]
+    now[0] += 3600
+    assert cache.get("k4") is None  # expired entries are never served
+    cache.set("k5", "v5")
+    rows = cache.connection().execute("SELECT key FROM cache").fetchall()
+    assert rows == [("k5",)]
@@ -0,0 +1,17 @@
+import pytest
+
+import main
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return main.TfidfClassifier()
+
+
+def test_category_terms_do_not_dilute_the_country(classifier):
+    text = "Mumbai. " + " ".join(main.CATEGORY_LEXICON["Finance"] + main.CATEGORY_LEXICON["Economy"])
+    assert classifier.classify_batch([text]) == [("India", "Finance")]
+
+
+def test_no_lexicon_terms_falls_back(classifier):
+    assert classifier.classify_batch(["", "Nothing to see here."]) == [("Global", "General")] * 2